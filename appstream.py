@@ -45,32 +45,117 @@ import argparse
 import gzip
 import json
 import os
+import re
+import shutil
 import subprocess
 import sys
-import urllib.request
-import xml.etree.ElementTree as ET
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
+from functools import cache
+from itertools import islice
 from pathlib import Path
 from typing import ClassVar
 from urllib.parse import urlparse
 
 import tldextract
+import urllib3
+
+try:
+	import orjson
+except ImportError:
+	# orjson is an optional speedup; fall back to the stdlib json module
+	orjson = None
+
+try:
+	import ijson
+except ImportError:
+	# ijson is optional; without it the nix-env output is parsed in one piece
+	ijson = None
+
+try:
+	from isal import igzip
+except ImportError:
+	# python-isal is an optional speedup; fall back to the stdlib gzip module
+	igzip = None
+
+try:
+	from lxml import etree as ET
+except ImportError:
+	# lxml is an optional speedup; the stdlib ElementTree API is compatible
+	import xml.etree.ElementTree as ET
 
 # Flathub AppStream data URLs
 FLATHUB_APPSTREAM_URL = "https://dl.flathub.org/repo/appstream/x86_64/appstream.xml.gz"
 FLATHUB_ICONS_BASE_URL = "https://dl.flathub.org/repo/appstream/x86_64/icons"
 
+# Number of concurrent icon downloads during catalog generation
+ICON_DOWNLOAD_WORKERS = 32
+
+# Block size used when streaming the catalog into its gzip file
+GZIP_COPY_BUFSIZE = 128 * 1024
+
+# Block size used when streaming HTTP responses to disk
+DOWNLOAD_BUFSIZE = 64 * 1024
+
+# Flathub IDs handed to each correlation worker process at a time
+CORRELATE_CHUNK_SIZE = 64
+
 # Default cache directory
 DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "nix-appstream"
 
 
+# =============================================================================
+# JSON Helpers
+# =============================================================================
+
+
+def _loads_json(data: bytes):
+	"""Parse a JSON document from bytes, using orjson when available."""
+	if orjson is not None:
+		return orjson.loads(data)
+	return json.loads(data)
+
+
+def _load_json(path: Path):
+	"""Load a JSON file, using orjson when available."""
+	return _loads_json(path.read_bytes())
+
+
+def _dump_json(data, path: Path) -> None:
+	"""Write data to a JSON file with 2-space indentation, using orjson when available."""
+	if orjson is not None:
+		path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+		return
+	with open(path, "w") as f:
+		json.dump(data, f, indent=2)
+
+
+def _dump_ndjson(records, path: Path) -> None:
+	"""Write records as newline-delimited JSON, one compact object per line."""
+	with open(path, "wb") as f:
+		for record in records:
+			if orjson is not None:
+				f.write(orjson.dumps(record))
+			else:
+				f.write(json.dumps(record, separators=(",", ":")).encode())
+			f.write(b"\n")
+
+
+def _gzip_file(src: Path, dest: Path) -> None:
+	"""Stream src into a gzip file at dest, using python-isal when available."""
+	out = igzip.open(dest, "wb") if igzip is not None else gzip.open(dest, "wb", compresslevel=6)
+	with open(src, "rb") as f_in, out as f_out:
+		shutil.copyfileobj(f_in, f_out, GZIP_COPY_BUFSIZE)
+
+
 # =============================================================================
 # Data Classes
 # =============================================================================
 
 
-@dataclass
+@dataclass(slots=True)
 class NixPackage:
 	"""Represents a nixpkgs package with metadata for correlation."""
 
@@ -80,9 +165,16 @@ class NixPackage:
 	description: str = ""
 	homepage: str = ""
 	license: str = ""
+	# Lowercased keys used by the correlation indexes, computed once per package
+	attr_lower: str = field(init=False, repr=False, compare=False)
+	pname_lower: str = field(init=False, repr=False, compare=False)
 
+	def __post_init__(self):
+		self.attr_lower = self.attr.lower()
+		self.pname_lower = self.pname.lower()
 
-@dataclass
+
+@dataclass(slots=True)
 class FlathubComponent:
 	"""Represents an AppStream component from Flathub."""
 
@@ -97,10 +189,17 @@ class FlathubComponent:
 	icon_cached: str | None = None
 	homepage: str | None = None
 	developer_name: str | None = None
-	raw_xml: str = ""
+	element: ET.Element | None = None  # Parsed <component> element, transformed for the catalog
+	# Lowercased ID and its dot-separated parts used by correlation, computed once per component
+	id_lower: str = field(init=False, repr=False, compare=False)
+	id_parts: tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+	def __post_init__(self):
+		self.id_lower = self.id.lower()
+		self.id_parts = tuple(self.id_lower.split("."))
 
 
-@dataclass
+@dataclass(slots=True)
 class AppStreamMapping:
 	"""Mapping between a Flathub component and nixpkgs package."""
 
@@ -118,6 +217,33 @@ class AppStreamMapping:
 # Default path for prepackaged nixpkgs data
 DEFAULT_NIXPKGS_DATA = Path(__file__).parent / "nixpkgs-apps.json"
 
+# Lowercase pname and attr indexes used for correlation lookups
+PackageIndexes = tuple[dict[str, list[NixPackage]], dict[str, list[NixPackage]]]
+
+
+def build_package_indexes(nixpkgs_packages: dict[str, NixPackage]) -> PackageIndexes:
+	"""
+	Index packages by lowercase pname and lowercase attr.
+
+	Args:
+		nixpkgs_packages: Dict of attr -> NixPackage
+
+	Returns:
+		Tuple of (pname index, attr index), each mapping a key to its packages
+	"""
+	pname_to_packages: dict[str, list[NixPackage]] = {}
+	attr_to_packages: dict[str, list[NixPackage]] = {}
+	for pkg in nixpkgs_packages.values():
+		if pkg.pname_lower not in pname_to_packages:
+			pname_to_packages[pkg.pname_lower] = []
+		pname_to_packages[pkg.pname_lower].append(pkg)
+
+		if pkg.attr_lower not in attr_to_packages:
+			attr_to_packages[pkg.attr_lower] = []
+		attr_to_packages[pkg.attr_lower].append(pkg)
+
+	return pname_to_packages, attr_to_packages
+
 
 class NixpkgsLoader:
 	"""
@@ -137,6 +263,8 @@ class NixpkgsLoader:
 		"""
 		self.data_file = data_file
 		self._packages: dict[str, NixPackage] = {}
+		self._loaded = False
+		self._indexes: PackageIndexes | None = None
 
 	def load(self) -> dict[str, NixPackage]:
 		"""
@@ -145,18 +273,20 @@ class NixpkgsLoader:
 		Returns:
 			Dict mapping package attr to NixPackage
 		"""
-		if self._packages:
+		if self._loaded:
 			return self._packages
+		self._loaded = True
 
-		if not self.data_file.exists():
+		try:
+			raw = self.data_file.read_bytes()
+		except FileNotFoundError:
 			print(f"Warning: Nixpkgs data file not found: {self.data_file}", file=sys.stderr)
 			print("Run 'nix-appstream refresh' on a machine with nixpkgs access", file=sys.stderr)
-			return {}
+			return self._packages
 
 		print(f"Loading nixpkgs data from {self.data_file}...")
 
-		with open(self.data_file) as f:
-			data = json.load(f)
+		data = _loads_json(raw)
 
 		packages_data = data.get("packages", {})
 		for attr, pkg_data in packages_data.items():
@@ -177,9 +307,22 @@ class NixpkgsLoader:
 
 	def get_package(self, attr: str) -> NixPackage | None:
 		"""Get a specific package by attribute name."""
-		if not self._packages:
-			self.load()
-		return self._packages.get(attr)
+		return self.load().get(attr)
+
+	def get_indexes(self) -> PackageIndexes:
+		"""
+		Get the lowercase pname and attr indexes, built once per loader.
+
+		Returns:
+			Tuple of (pname index, attr index), each mapping a key to its packages
+		"""
+		if self._indexes is None:
+			self._indexes = build_package_indexes(self.load())
+		return self._indexes
+
+	def get_by_pname(self, pname: str) -> list[NixPackage]:
+		"""Get all packages with the given pname (case-insensitive)."""
+		return self.get_indexes()[0].get(pname.lower(), [])
 
 
 # =============================================================================
@@ -200,6 +343,38 @@ class FlathubFetcher:
 		self.cache_dir = cache_dir
 		self.cache_dir.mkdir(parents=True, exist_ok=True)
 
+		# Keep-alive connection pool shared by all downloads (thread-safe)
+		self._http = urllib3.PoolManager(
+			num_pools=4,
+			maxsize=ICON_DOWNLOAD_WORKERS,
+			retries=urllib3.Retry(3, backoff_factor=0.3),
+		)
+
+	def _download(self, url: str, dest: Path) -> int:
+		"""
+		Stream a URL to a file over the shared connection pool.
+
+		The file is only written for a 200 response, via a temporary sibling
+		that is renamed into place so a failed transfer never leaves a partial file.
+
+		Args:
+			url: URL to download
+			dest: Destination file path
+
+		Returns:
+			HTTP status code of the response
+		"""
+		response = self._http.request("GET", url, preload_content=False)
+		try:
+			if response.status == 200:
+				tmp_path = dest.with_name(dest.name + ".part")
+				with open(tmp_path, "wb") as f:
+					shutil.copyfileobj(response, f, DOWNLOAD_BUFSIZE)
+				tmp_path.replace(dest)
+			return response.status
+		finally:
+			response.release_conn()
+
 	def fetch_appstream_data(self, max_age_hours: int = 24) -> Path:
 		"""
 		Download and cache Flathub AppStream data.
@@ -208,36 +383,32 @@ class FlathubFetcher:
 			max_age_hours: Maximum cache age in hours before re-downloading
 
 		Returns:
-			Path to the decompressed XML file
+			Path to the gzip-compressed XML file
 		"""
 		gz_path = self.cache_dir / "flathub-appstream.xml.gz"
-		xml_path = self.cache_dir / "flathub-appstream.xml"
 
 		# Check if we have a recent cache
-		if xml_path.exists():
+		if gz_path.exists():
 			import time
 
-			age_hours = (time.time() - xml_path.stat().st_mtime) / 3600
+			age_hours = (time.time() - gz_path.stat().st_mtime) / 3600
 			if age_hours < max_age_hours:
 				print(f"Using cached Flathub data (age: {age_hours:.1f}h)")
-				return xml_path
+				return gz_path
 
 		print("Downloading Flathub AppStream data...")
-		urllib.request.urlretrieve(FLATHUB_APPSTREAM_URL, gz_path)
-
-		print("Decompressing...")
-		with gzip.open(gz_path, "rb") as f_in:
-			with open(xml_path, "wb") as f_out:
-				f_out.write(f_in.read())
+		status = self._download(FLATHUB_APPSTREAM_URL, gz_path)
+		if status != 200:
+			raise RuntimeError(f"Failed to download {FLATHUB_APPSTREAM_URL}: HTTP {status}")
 
-		return xml_path
+		return gz_path
 
 	def parse_appstream(self, xml_path: Path) -> dict[str, FlathubComponent]:
 		"""
 		Parse Flathub AppStream XML into components.
 
 		Args:
-			xml_path: Path to the AppStream XML file
+			xml_path: Path to the AppStream XML file (plain or .gz)
 
 		Returns:
 			Dict mapping component ID (desktop ID) to FlathubComponent
@@ -245,111 +416,136 @@ class FlathubFetcher:
 		print(f"Parsing {xml_path}...")
 		components: dict[str, FlathubComponent] = {}
 
-		tree = ET.parse(xml_path)
-		root = tree.getroot()
+		# Compressed catalogs are decompressed on the fly as the parser reads
+		source = gzip.open(xml_path, "rb") if xml_path.suffix == ".gz" else open(xml_path, "rb")
 
-		for component in root.findall(".//component"):
-			# Only process desktop applications
-			comp_type = component.get("type", "")
-			if comp_type != "desktop-application":
-				continue
+		with source:
+			# Stream the document instead of building the full tree. Processed
+			# components are dropped from the root so memory stays bounded.
+			context = ET.iterparse(source, events=("start", "end"))
+			_event, root = next(context)
 
-			# Get component ID
-			id_elem = component.find("id")
-			if id_elem is None or not id_elem.text:
-				continue
+			for event, component in context:
+				if event != "end" or component.tag != "component":
+					continue
 
-			comp_id = id_elem.text
-			# Normalize ID (remove .desktop suffix if present)
-			if comp_id.endswith(".desktop"):
-				comp_id = comp_id[:-8]
-
-			# Extract metadata
-			name_elem = component.find("name")
-			summary_elem = component.find("summary")
-			desc_elem = component.find("description")
-
-			# Get description text (may have nested <p> tags)
-			description = ""
-			if desc_elem is not None:
-				desc_parts = []
-				for p in desc_elem.findall("p"):
-					if p.text:
-						desc_parts.append(p.text)
-				description = "\n\n".join(desc_parts)
-				if not description and desc_elem.text:
-					description = desc_elem.text
-
-			# Get categories
-			categories = []
-			for cat in component.findall(".//category"):
-				if cat.text:
-					categories.append(cat.text)
-
-			# Get keywords
-			keywords = []
-			for kw in component.findall(".//keyword"):
-				if kw.text:
-					keywords.append(kw.text)
-
-			# Get screenshots
-			screenshots = []
-			for screenshot in component.findall(".//screenshot/image"):
-				if screenshot.text and screenshot.get("type") == "source":
-					screenshots.append(screenshot.text)
-
-			# Get icon
-			icon_url = None
-			icon_cached = None
-			for icon in component.findall("icon"):
-				icon_type = icon.get("type", "")
-				if icon_type == "remote" and icon.text:
-					icon_url = icon.text
-				elif icon_type == "cached" and icon.text:
-					icon_cached = icon.text
-
-			# Get homepage
-			homepage = None
-			for url in component.findall("url"):
-				if url.get("type") == "homepage" and url.text:
-					homepage = url.text
-					break
-
-			# Get developer name
-			developer_name = None
-			dev_elem = component.find("developer_name")
-			if dev_elem is not None and dev_elem.text:
-				developer_name = dev_elem.text
-
-			# Store raw XML for later transformation
-			raw_xml = ET.tostring(component, encoding="unicode")
-
-			components[comp_id] = FlathubComponent(
-				id=comp_id,
-				name=name_elem.text if name_elem is not None and name_elem.text else comp_id,
-				summary=summary_elem.text if summary_elem is not None and summary_elem.text else "",
-				description=description,
-				categories=categories,
-				keywords=keywords,
-				screenshots=screenshots,
-				icon_url=icon_url,
-				icon_cached=icon_cached,
-				homepage=homepage,
-				developer_name=developer_name,
-				raw_xml=raw_xml,
-			)
+				# Only process desktop applications; fonts, addons, codecs etc. are
+				# dropped without looking at their children
+				if component.get("type") == "desktop-application":
+					parsed = self._parse_component(component)
+					if parsed:
+						components[parsed.id] = parsed
+
+				root.clear()
 
 		print(f"Parsed {len(components)} desktop applications from Flathub")
 		return components
 
-	def download_icon(
+	def _parse_component(self, component) -> FlathubComponent | None:
+		"""
+		Extract a FlathubComponent from a desktop-application <component> element.
+
+		Returns:
+			FlathubComponent, or None if the component has no ID
+		"""
+		# Collect metadata in a single pass over the component's children.
+		# Singular elements keep their first occurrence, like find() would.
+		id_elem = name_elem = summary_elem = desc_elem = dev_elem = None
+		categories = []
+		keywords = []
+		screenshots = []
+		icon_url = None
+		icon_cached = None
+		homepage = None
+		for child in component:
+			tag = child.tag
+			if tag == "id":
+				if id_elem is None:
+					id_elem = child
+			elif tag == "name":
+				if name_elem is None:
+					name_elem = child
+			elif tag == "summary":
+				if summary_elem is None:
+					summary_elem = child
+			elif tag == "description":
+				if desc_elem is None:
+					desc_elem = child
+			elif tag == "categories":
+				for cat in child:
+					if cat.tag == "category" and cat.text:
+						categories.append(cat.text)
+			elif tag == "keywords":
+				for kw in child:
+					if kw.tag == "keyword" and kw.text:
+						keywords.append(kw.text)
+			elif tag == "screenshots":
+				for screenshot in child:
+					if screenshot.tag != "screenshot":
+						continue
+					for image in screenshot:
+						if image.tag == "image" and image.text and image.get("type") == "source":
+							screenshots.append(image.text)
+			elif tag == "icon":
+				icon_type = child.get("type", "")
+				if icon_type == "remote" and child.text:
+					icon_url = child.text
+				elif icon_type == "cached" and child.text:
+					icon_cached = child.text
+			elif tag == "url":
+				if homepage is None and child.get("type") == "homepage" and child.text:
+					homepage = child.text
+			elif tag == "developer_name":
+				if dev_elem is None:
+					dev_elem = child
+
+		# Get component ID
+		if id_elem is None or not id_elem.text:
+			return None
+
+		comp_id = id_elem.text
+		# Normalize ID (remove .desktop suffix if present)
+		if comp_id.endswith(".desktop"):
+			comp_id = comp_id[:-8]
+
+		# Get description text (may have nested <p> tags)
+		description = ""
+		if desc_elem is not None:
+			desc_parts = []
+			for p in desc_elem.findall("p"):
+				if p.text:
+					desc_parts.append(p.text)
+			description = "\n\n".join(desc_parts)
+			if not description and desc_elem.text:
+				description = desc_elem.text
+
+		developer_name = dev_elem.text if dev_elem is not None and dev_elem.text else None
+
+		return FlathubComponent(
+			id=comp_id,
+			name=name_elem.text if name_elem is not None and name_elem.text else comp_id,
+			summary=summary_elem.text if summary_elem is not None and summary_elem.text else "",
+			description=description,
+			categories=categories,
+			keywords=keywords,
+			screenshots=screenshots,
+			icon_url=icon_url,
+			icon_cached=icon_cached,
+			homepage=homepage,
+			developer_name=developer_name,
+			# Keep the element itself for later transformation; iterparse
+			# only detaches it from the root, so it stays intact
+			element=component,
+		)
+
+	def icon_download_tasks(
 		self,
 		component: FlathubComponent,
 		output_dir: Path,
 		sizes: list[str] | None = None,
-	) -> dict[str, Path]:
+	) -> list[tuple[str, str, Path]]:
 		"""
-		Download icons for a component.
+		List the icon downloads needed for a component.
 
 		Args:
 			component: FlathubComponent to download icons for
@@ -357,12 +553,12 @@ class FlathubFetcher:
 			sizes: Icon sizes to download (default: ["64x64", "128x128"])
 
 		Returns:
-			Dict mapping size to downloaded icon path
+			List of (size, url, destination path) tuples
 		"""
 		if sizes is None:
 			sizes = ["64x64", "128x128"]
 
-		downloaded = {}
+		tasks = []
 
 		for size in sizes:
 			icon_dir = output_dir / "icons" / size
@@ -375,24 +571,51 @@ class FlathubFetcher:
 					icon_filename += ".png"
 
 				icon_url = f"{FLATHUB_ICONS_BASE_URL}/{size}/{icon_filename}"
-				icon_path = icon_dir / f"{component.id}.png"
-
-				try:
-					urllib.request.urlretrieve(icon_url, icon_path)
-					downloaded[size] = icon_path
-				except Exception:
-					pass
+				tasks.append((size, icon_url, icon_dir / f"{component.id}.png"))
 
 			# Fall back to remote icon
 			elif component.icon_url:
 				ext = ".svg" if component.icon_url.endswith(".svg") else ".png"
-				icon_path = icon_dir / f"{component.id}{ext}"
+				tasks.append((size, component.icon_url, icon_dir / f"{component.id}{ext}"))
 
-				try:
-					urllib.request.urlretrieve(component.icon_url, icon_path)
-					downloaded[size] = icon_path
-				except Exception:
-					pass
+		return tasks
+
+	def fetch_icon(self, url: str, icon_path: Path) -> bool:
+		"""
+		Download a single icon using the shared connection pool.
+
+		Safe to call from multiple threads.
+
+		Returns:
+			True if the icon was downloaded
+		"""
+		try:
+			return self._download(url, icon_path) == 200
+		except Exception:
+			return False
+
+	def download_icon(
+		self,
+		component: FlathubComponent,
+		output_dir: Path,
+		sizes: list[str] | None = None,
+	) -> dict[str, Path]:
+		"""
+		Download icons for a component.
+
+		Args:
+			component: FlathubComponent to download icons for
+			output_dir: Base output directory for icons
+			sizes: Icon sizes to download (default: ["64x64", "128x128"])
+
+		Returns:
+			Dict mapping size to downloaded icon path
+		"""
+		downloaded = {}
+
+		for size, icon_url, icon_path in self.icon_download_tasks(component, output_dir, sizes):
+			if self.fetch_icon(icon_url, icon_path):
+				downloaded[size] = icon_path
 
 		return downloaded
 
@@ -402,6 +625,28 @@ class FlathubFetcher:
 # =============================================================================
 
 
+@cache
+def _parse_homepage(homepage: str) -> tuple[str, str, tuple[str, ...]] | None:
+	"""
+	Split a homepage URL into lowercase domain, subdomain and path parts.
+
+	Uses tldextract for proper URL domain parsing. Results are cached since the
+	same homepage is checked against many Flathub IDs during correlation.
+
+	Returns:
+		Tuple of (domain, subdomain, path_parts), or None if the URL can't be parsed
+	"""
+	try:
+		ext = tldextract.extract(homepage)
+		parsed = urlparse(homepage)
+	except Exception:
+		return None
+
+	path_parts = tuple(p for p in parsed.path.split("/") if p)
+	subdomain = ext.subdomain.lower() if ext.subdomain else ""
+	return ext.domain.lower(), subdomain, path_parts
+
+
 class CorrelationEngine:
 	"""
 	Correlates nixpkgs packages with Flathub components using intelligent matching.
@@ -440,17 +685,18 @@ class CorrelationEngine:
 	def load_known_mappings(self, mappings_file: Path):
 		"""Load known mappings from a JSON file."""
 		if mappings_file.exists():
-			with open(mappings_file) as f:
-				data = json.load(f)
-				# Filter out comment keys
-				for k, v in data.items():
-					if not k.startswith("_"):
-						self._known_mappings[k] = v
+			data = _load_json(mappings_file)
+			# Filter out comment keys
+			for k, v in data.items():
+				if not k.startswith("_"):
+					self._known_mappings[k] = v
 
 	def correlate(
 		self,
 		flathub_components: dict[str, FlathubComponent],
 		nixpkgs_packages: dict[str, NixPackage],
+		workers: int = 1,
+		indexes: PackageIndexes | None = None,
 	) -> list[AppStreamMapping]:
 		"""
 		Correlate Flathub components with nixpkgs packages.
@@ -458,54 +704,60 @@ class CorrelationEngine:
 		Uses intelligent matching based on pname and homepage analysis.
 		Known mappings are applied as overrides for cases where auto-matching fails.
 
+		Candidate scoring is independent per component and can be spread over
+		worker processes; candidates are then assigned serially in component
+		order, so the result does not depend on the number of workers.
+
 		Args:
 			flathub_components: Dict of flathub_id -> FlathubComponent
 			nixpkgs_packages: Dict of attr -> NixPackage
+			workers: Number of processes used to score candidates
+			indexes: Prebuilt package indexes (see NixpkgsLoader.get_indexes);
+				built from nixpkgs_packages when omitted
 
 		Returns:
 			List of AppStreamMapping objects
 		"""
-		mappings: list[AppStreamMapping] = []
+		mappings: dict[str, AppStreamMapping] = {}  # flathub_id -> mapping
 		matched_flathub_ids: set[str] = set()
 		matched_nix_attrs: set[str] = set()
 
-		# Build indexes for efficient matching
-		pname_to_packages: dict[str, list[NixPackage]] = {}
-		for pkg in nixpkgs_packages.values():
-			pname_lower = pkg.pname.lower()
-			if pname_lower not in pname_to_packages:
-				pname_to_packages[pname_lower] = []
-			pname_to_packages[pname_lower].append(pkg)
+		# Indexes for efficient matching
+		if indexes is None:
+			indexes = build_package_indexes(nixpkgs_packages)
+		pname_to_packages, attr_to_packages = indexes
 
 		# Strategy 1: Automatic pname + homepage matching
-		for flathub_id, _component in flathub_components.items():
-			# Parse Flathub ID parts
-			flathub_parts = flathub_id.lower().split(".")
-			if len(flathub_parts) < 2:
-				continue
-
-			flathub_name = flathub_parts[-1]  # e.g., "firefox" from "org.mozilla.firefox"
+		flathub_ids = list(flathub_components)
+		flathub_id_parts = [component.id_parts for component in flathub_components.values()]
+		if workers > 1 and len(flathub_ids) > CORRELATE_CHUNK_SIZE:
+			with ProcessPoolExecutor(
+				max_workers=workers,
+				initializer=_init_correlation_worker,
+				initargs=(self, pname_to_packages, attr_to_packages),
+			) as executor:
+				all_candidates = list(
+					executor.map(_score_candidates_worker, flathub_id_parts, chunksize=CORRELATE_CHUNK_SIZE)
+				)
+		else:
+			all_candidates = [
+				self._score_candidates(id_parts, pname_to_packages, attr_to_packages)
+				for id_parts in flathub_id_parts
+			]
 
-			# Try to find matching nixpkgs package
-			match = self._find_best_match(
-				flathub_id,
-				flathub_parts,
-				flathub_name,
-				pname_to_packages,
-				nixpkgs_packages,
-				matched_nix_attrs,
-			)
+		# Greedily assign each component its best candidate not already taken
+		for flathub_id, candidates in zip(flathub_ids, all_candidates, strict=True):
+			match = next((c for c in candidates if c[0] not in matched_nix_attrs), None)
 
 			if match:
-				pkg, confidence, reason = match
-				mappings.append(
-					AppStreamMapping(
-						flathub_id=flathub_id,
-						nixpkgs_attr=pkg.attr,
-						nixpkgs_version=pkg.version,
-						confidence=confidence,
-						match_reason=reason,
-					)
+				attr, confidence, reason = match
+				pkg = nixpkgs_packages[attr]
+				mappings[flathub_id] = AppStreamMapping(
+					flathub_id=flathub_id,
+					nixpkgs_attr=pkg.attr,
+					nixpkgs_version=pkg.version,
+					confidence=confidence,
+					match_reason=reason,
 				)
 				matched_flathub_ids.add(flathub_id)
 				matched_nix_attrs.add(pkg.attr)
@@ -519,11 +771,7 @@ class CorrelationEngine:
 			pkg = nixpkgs_packages[nixpkgs_attr]
 
 			# Check if we already have a mapping for this flathub_id
-			existing_idx = None
-			for i, m in enumerate(mappings):
-				if m.flathub_id == flathub_id:
-					existing_idx = i
-					break
+			existing = mappings.get(flathub_id)
 
 			new_mapping = AppStreamMapping(
 				flathub_id=flathub_id,
@@ -533,76 +781,84 @@ class CorrelationEngine:
 				match_reason="override mapping",
 			)
 
-			if existing_idx is not None:
+			if existing is not None:
 				# Replace existing mapping (override)
-				old_attr = mappings[existing_idx].nixpkgs_attr
-				if old_attr != nixpkgs_attr:
-					matched_nix_attrs.discard(old_attr)
-				mappings[existing_idx] = new_mapping
+				if existing.nixpkgs_attr != nixpkgs_attr:
+					matched_nix_attrs.discard(existing.nixpkgs_attr)
 			else:
 				# Add new mapping
-				mappings.append(new_mapping)
 				matched_flathub_ids.add(flathub_id)
+			mappings[flathub_id] = new_mapping
 
 			matched_nix_attrs.add(nixpkgs_attr)
 
 		# Sort by confidence
-		mappings.sort(key=lambda m: (-m.confidence, m.flathub_id))
-
-		return mappings
+		return sorted(mappings.values(), key=lambda m: (-m.confidence, m.flathub_id))
 
-	def _find_best_match(
+	def _score_candidates(
 		self,
-		flathub_id: str,
-		flathub_parts: list[str],
-		flathub_name: str,
+		flathub_parts: tuple[str, ...],
 		pname_to_packages: dict[str, list[NixPackage]],
-		nixpkgs_packages: dict[str, NixPackage],
-		matched_attrs: set[str],
-	) -> tuple[NixPackage, float, str] | None:
+		attr_to_packages: dict[str, list[NixPackage]],
+	) -> list[tuple[str, float, str]]:
 		"""
-		Find the best matching nixpkgs package for a Flathub component.
+		Score the nixpkgs packages that could match a Flathub component.
+
+		Args:
+			flathub_parts: Flathub ID split by dots (lowercase)
+			pname_to_packages: Index of lowercase pname -> packages
+			attr_to_packages: Index of lowercase attr -> packages
 
 		Returns:
-			Tuple of (NixPackage, confidence, reason) or None
+			List of (nixpkgs attr, confidence, reason) tuples, best first
 		"""
-		candidates: list[tuple[NixPackage, float, str]] = []
+		if len(flathub_parts) < 2:
+			return []
 
-		# Check pname matches
-		if flathub_name in pname_to_packages:
-			for pkg in pname_to_packages[flathub_name]:
-				if pkg.attr in matched_attrs:
-					continue
+		flathub_name = flathub_parts[-1]  # e.g., "firefox" from "org.mozilla.firefox"
+		pname_matches = pname_to_packages.get(flathub_name, ())
+		attr_matches = attr_to_packages.get(flathub_name, ())
 
-				# Verify with homepage if available
-				homepage_match = self._check_homepage_match(pkg.homepage, flathub_parts)
+		# Most Flathub IDs have no pname/attr candidate at all
+		if not pname_matches and not attr_matches:
+			return []
 
-				if homepage_match:
-					# Both pname and homepage match - high confidence
-					candidates.append((pkg, 0.95, f"pname '{flathub_name}' + homepage match"))
-				else:
-					# Only pname matches - medium confidence
-					candidates.append((pkg, 0.7, f"pname '{flathub_name}' match"))
+		candidates: list[tuple[str, float, str]] = []
 
-		# Also check if attr name matches (sometimes different from pname)
-		for pkg in nixpkgs_packages.values():
-			if pkg.attr in matched_attrs:
-				continue
-			if pkg.attr.lower() == flathub_name:
-				homepage_match = self._check_homepage_match(pkg.homepage, flathub_parts)
-				if homepage_match:
-					candidates.append((pkg, 0.9, f"attr '{flathub_name}' + homepage match"))
-				elif pkg.pname.lower() != flathub_name:  # Don't duplicate pname matches
-					candidates.append((pkg, 0.6, f"attr '{flathub_name}' match"))
-
-		# Return best candidate
-		if candidates:
-			candidates.sort(key=lambda x: -x[1])
-			return candidates[0]
+		# Domain-like parts of the ID (excluding the app name itself),
+		# built once for all candidates' homepage checks
+		flathub_domain_parts = frozenset(flathub_parts[:-1])
 
-		return None
+		# Check pname matches
+		for pkg in pname_matches:
+			# Verify with homepage if available
+			homepage_match = self._check_homepage_match(pkg.homepage, flathub_parts, flathub_domain_parts)
 
-	def _check_homepage_match(self, homepage: str, flathub_parts: list[str]) -> bool:
+			if homepage_match:
+				# Both pname and homepage match - high confidence
+				candidates.append((pkg.attr, 0.95, f"pname '{flathub_name}' + homepage match"))
+			else:
+				# Only pname matches - medium confidence
+				candidates.append((pkg.attr, 0.7, f"pname '{flathub_name}' match"))
+
+		# Also check if attr name matches (sometimes different from pname)
+		for pkg in attr_matches:
+			homepage_match = self._check_homepage_match(pkg.homepage, flathub_parts, flathub_domain_parts)
+			if homepage_match:
+				candidates.append((pkg.attr, 0.9, f"attr '{flathub_name}' + homepage match"))
+			elif pkg.pname_lower != flathub_name:  # Don't duplicate pname matches
+				candidates.append((pkg.attr, 0.6, f"attr '{flathub_name}' match"))
+
+		# Best candidate first; the stable sort keeps discovery order for ties
+		candidates.sort(key=lambda x: -x[1])
+		return candidates
+
+	def _check_homepage_match(
+		self,
+		homepage: str,
+		flathub_parts: tuple[str, ...],
+		flathub_domain_parts: frozenset[str],
+	) -> bool:
 		"""
 		Check if a homepage URL matches the Flathub ID structure.
 
@@ -615,6 +871,7 @@ class CorrelationEngine:
 		Args:
 			homepage: Package homepage URL
 			flathub_parts: Flathub ID split by dots (lowercase)
+			flathub_domain_parts: Set of flathub_parts without the last (app name) part
 
 		Returns:
 			True if homepage correlates with Flathub ID
@@ -622,22 +879,20 @@ class CorrelationEngine:
 		if not homepage:
 			return False
 
-		try:
-			# Parse URL using tldextract for proper domain handling
-			ext = tldextract.extract(homepage)
-			parsed = urlparse(homepage)
-			path_parts = [p for p in parsed.path.split("/") if p]
+		parsed_homepage = _parse_homepage(homepage)
+		if parsed_homepage is None:
+			return False
 
-			domain = ext.domain.lower()
-			subdomain = ext.subdomain.lower() if ext.subdomain else ""
+		domain, subdomain, path_parts = parsed_homepage
 
+		try:
 			# Check for special subdomain combinations (e.g., gitlab.gnome.org)
 			for (sub, dom), flathub_prefix in self.GIT_SUBDOMAINS.items():
 				if subdomain == sub and domain == dom:
 					# For these, check username in path
 					if path_parts and len(flathub_parts) >= 3:
 						username = path_parts[0].lower()
-						expected_prefix = flathub_prefix.split(".")
+						expected_prefix = tuple(flathub_prefix.split("."))
 						if (
 							flathub_parts[: len(expected_prefix)] == expected_prefix
 							and len(flathub_parts) > len(expected_prefix)
@@ -656,7 +911,7 @@ class CorrelationEngine:
 				# e.g., github.com/alainm23/planify -> io.github.alainm23.planify
 				if path_parts and len(flathub_parts) >= 3:
 					username = path_parts[0].lower()
-					expected_prefix = flathub_prefix.split(".")
+					expected_prefix = tuple(flathub_prefix.split("."))
 					if (
 						flathub_parts[: len(expected_prefix)] == expected_prefix
 						and len(flathub_parts) > len(expected_prefix)
@@ -671,11 +926,11 @@ class CorrelationEngine:
 			# Standard domain matching
 			# Check if domain appears in Flathub ID
 			# e.g., "mozilla" should be in ["org", "mozilla", "firefox"]
-			if domain in flathub_parts[:-1]:  # Don't match the app name itself
+			if domain in flathub_domain_parts:  # Don't match the app name itself
 				return True
 
 			# Also check subdomain if present
-			if subdomain and subdomain not in ("www",) and subdomain in flathub_parts[:-1]:
+			if subdomain and subdomain not in ("www",) and subdomain in flathub_domain_parts:
 				return True
 
 			return False
@@ -694,6 +949,26 @@ class CorrelationEngine:
 		}
 
 
+# State for correlation worker processes, set once per process by the initializer
+_correlation_worker_state: tuple = ()
+
+
+def _init_correlation_worker(
+	engine: CorrelationEngine,
+	pname_to_packages: dict[str, list[NixPackage]],
+	attr_to_packages: dict[str, list[NixPackage]],
+):
+	"""Store the read-only correlation indexes in a worker process."""
+	global _correlation_worker_state
+	_correlation_worker_state = (engine, pname_to_packages, attr_to_packages)
+
+
+def _score_candidates_worker(flathub_parts: tuple[str, ...]) -> list[tuple[str, float, str]]:
+	"""Score candidates for one Flathub ID inside a worker process."""
+	engine, pname_to_packages, attr_to_packages = _correlation_worker_state
+	return engine._score_candidates(flathub_parts, pname_to_packages, attr_to_packages)
+
+
 # =============================================================================
 # AppStream Catalog Generator
 # =============================================================================
@@ -719,6 +994,7 @@ class AppStreamGenerator:
 		nixpkgs_packages: dict[str, NixPackage],
 		download_icons: bool = True,
 		fetcher: FlathubFetcher | None = None,
+		pretty: bool = False,
 	) -> Path:
 		"""
 		Generate AppStream catalog XML.
@@ -731,6 +1007,7 @@ class AppStreamGenerator:
 			nixpkgs_packages: Nixpkgs package data
 			download_icons: Whether to download icons
 			fetcher: FlathubFetcher for icon downloads
+			pretty: Indent the written XML for human inspection
 
 		Returns:
 			Path to generated catalog
@@ -742,35 +1019,30 @@ class AppStreamGenerator:
 		root.set("version", "0.16")
 		root.set("origin", "nixpkgs")
 
-		icon_count = 0
+		icon_tasks: list[tuple[str, str, Path]] = []
 
 		for mapping in mappings:
 			component = flathub_components.get(mapping.flathub_id)
-			if not component:
+			if not component or component.element is None:
 				continue
 
 			# Get nixpkgs info if available
-			nix_info = None
-			for pkg in nixpkgs_packages.values():
-				if pkg.attr == mapping.nixpkgs_attr:
-					nix_info = pkg
-					break
+			nix_info = nixpkgs_packages.get(mapping.nixpkgs_attr)
 
 			# Transform component XML
-			try:
-				transformed = self._transform_component(component, mapping, nix_info)
-				comp_elem = ET.fromstring(transformed)
-				root.append(comp_elem)
-
-				# Download icons
-				if download_icons and fetcher:
-					icons = fetcher.download_icon(component, self.output_dir)
-					if icons:
-						icon_count += 1
-
-			except ET.ParseError as e:
-				print(f"Error parsing component {mapping.flathub_id}: {e}", file=sys.stderr)
-				continue
+			root.append(self._transform_component(component, mapping, nix_info))
+
+			# Queue icon downloads
+			if download_icons and fetcher:
+				for _size, icon_url, icon_path in fetcher.icon_download_tasks(component, self.output_dir):
+					icon_tasks.append((component.id, icon_url, icon_path))
+
+		# Download icons concurrently over the fetcher's connection pool
+		icon_count = 0
+		if icon_tasks and fetcher:
+			with ThreadPoolExecutor(max_workers=ICON_DOWNLOAD_WORKERS) as executor:
+				results = executor.map(lambda task: fetcher.fetch_icon(task[1], task[2]), icon_tasks)
+				icon_count = len({task[0] for task, ok in zip(icon_tasks, results, strict=True) if ok})
 
 		# Write catalog
 		xml_dir = self.output_dir / "swcatalog" / "xml"
@@ -778,13 +1050,12 @@ class AppStreamGenerator:
 
 		catalog_path = xml_dir / "nixpkgs.xml"
 		tree = ET.ElementTree(root)
-		ET.indent(tree, space="  ")
-		tree.write(catalog_path, encoding="unicode", xml_declaration=True)
+		if pretty:
+			ET.indent(tree, space="  ")
+		tree.write(catalog_path, encoding="utf-8", xml_declaration=True)
 
 		# Compress
-		with open(catalog_path, "rb") as f_in:
-			with gzip.open(str(catalog_path) + ".gz", "wb") as f_out:
-				f_out.write(f_in.read())
+		_gzip_file(catalog_path, Path(str(catalog_path) + ".gz"))
 
 		print(f"Generated catalog: {catalog_path}.gz")
 		print(f"Downloaded {icon_count} icons")
@@ -807,16 +1078,20 @@ class AppStreamGenerator:
 		component: FlathubComponent,
 		mapping: AppStreamMapping,
 		nix_info: NixPackage | None,
-	) -> str:
+	) -> ET.Element:
 		"""
 		Transform a Flathub component for nixpkgs.
 
+		The component's parsed element is modified in place and returned.
+
 		Changes:
 		- Sets <pkgname> to nixpkgs attribute
 		- Updates version to nixpkgs version
 		- Updates icon paths to local
 		"""
-		elem = ET.fromstring(component.raw_xml)
+		elem = component.element
+		if elem is None:
+			raise ValueError(f"Component {component.id} has no parsed XML element")
 
 		# Update or add pkgname (nixpkgs attribute)
 		# Strip common prefixes like "nixos." that nix-env -qaP adds but aren't used
@@ -852,7 +1127,7 @@ class AppStreamGenerator:
 		# If we have nixpkgs-specific info, we could override description etc.
 		# But generally we defer to Flathub's richer metadata
 
-		return ET.tostring(elem, encoding="unicode")
+		return elem
 
 	def generate_report(
 		self,
@@ -863,6 +1138,9 @@ class AppStreamGenerator:
 		"""
 		Generate a JSON report of the correlation results.
 
+		When written to disk, the mapping entries are also written one per line
+		to a sibling .ndjson file for programmatic consumers.
+
 		Args:
 			mappings: List of correlations
 			flathub_components: Flathub components for stats
@@ -871,6 +1149,7 @@ class AppStreamGenerator:
 		Returns:
 			Report dictionary
 		"""
+		mapped_ids = {m.flathub_id for m in mappings}
 		report = {
 			"total_flathub_components": len(flathub_components),
 			"total_mappings": len(mappings),
@@ -895,14 +1174,14 @@ class AppStreamGenerator:
 			],
 			"unmapped_popular": [
 				{"id": comp.id, "name": comp.name}
-				for comp_id, comp in list(flathub_components.items())[:200]
-				if not any(m.flathub_id == comp_id for m in mappings)
+				for comp_id, comp in islice(flathub_components.items(), 200)
+				if comp_id not in mapped_ids
 			][:50],
 		}
 
 		if output_path:
-			with open(output_path, "w") as f:
-				json.dump(report, f, indent=2)
+			_dump_json(report, output_path)
+			_dump_ndjson(report["mappings"], output_path.with_suffix(".ndjson"))
 			print(f"Generated report: {output_path}")
 
 		return report
@@ -919,6 +1198,8 @@ def generate_appstream(
 	download_icons: bool = True,
 	mappings_file: Path | None = None,
 	nixpkgs_data: Path | None = None,
+	workers: int = 1,
+	pretty: bool = False,
 ) -> Path:
 	"""
 	Main workflow to generate AppStream data.
@@ -932,12 +1213,14 @@ def generate_appstream(
 		download_icons: Whether to download icons
 		mappings_file: Optional JSON file with known flathub_id -> attr mappings
 		nixpkgs_data: Path to prepackaged nixpkgs JSON data
+		workers: Number of processes used for correlation
+		pretty: Indent the catalog XML for human inspection
 
 	Returns:
 		Path to generated catalog
 	"""
 	# Initialize components
-	loader = NixpkgsLoader(nixpkgs_data) if nixpkgs_data else NixpkgsLoader()
+	loader = NixpkgsLoader(nixpkgs_data or DEFAULT_NIXPKGS_DATA)
 	fetcher = FlathubFetcher(cache_dir)
 	correlator = CorrelationEngine()
 	generator = AppStreamGenerator(output_dir)
@@ -965,7 +1248,9 @@ def generate_appstream(
 	print("=" * 60)
 	print("Step 3: Correlating packages (pname + homepage matching)")
 	print("=" * 60)
-	mappings = correlator.correlate(flathub_components, nixpkgs_packages)
+	mappings = correlator.correlate(
+		flathub_components, nixpkgs_packages, workers=workers, indexes=loader.get_indexes()
+	)
 	print(f"Created {len(mappings)} mappings")
 
 	# Show some stats
@@ -987,6 +1272,7 @@ def generate_appstream(
 		nixpkgs_packages,
 		download_icons=download_icons,
 		fetcher=fetcher,
+		pretty=pretty,
 	)
 
 	# Generate report
@@ -1002,9 +1288,29 @@ def generate_appstream(
 # =============================================================================
 
 
+def _resolve_optional(path_str: str | None) -> Path | None:
+	"""
+	Resolve an optional path argument with a single stat call.
+
+	Args:
+		path_str: Path from the command line, possibly empty
+
+	Returns:
+		The path if it names an existing file, otherwise None
+	"""
+	if not path_str:
+		return None
+	path = Path(path_str)
+	try:
+		path.stat()
+	except OSError:
+		return None
+	return path
+
+
 def cmd_generate(args):
 	"""Generate AppStream data."""
-	mappings_file = Path(args.mappings) if args.mappings and Path(args.mappings).exists() else None
+	mappings_file = _resolve_optional(args.mappings)
 	nixpkgs_data = Path(args.nixpkgs_data) if args.nixpkgs_data else None
 
 	generate_appstream(
@@ -1013,13 +1319,14 @@ def cmd_generate(args):
 		download_icons=not args.no_icons,
 		mappings_file=mappings_file,
 		nixpkgs_data=nixpkgs_data,
+		workers=args.jobs,
+		pretty=args.pretty,
 	)
 
 
 def cmd_info(args):
 	"""Show info about a nixpkgs package."""
-	nixpkgs_data = Path(args.nixpkgs_data) if args.nixpkgs_data else None
-	loader = NixpkgsLoader(nixpkgs_data) if nixpkgs_data else NixpkgsLoader()
+	loader = NixpkgsLoader(Path(args.nixpkgs_data) if args.nixpkgs_data else DEFAULT_NIXPKGS_DATA)
 
 	print(f"Looking up {args.package}...")
 	pkg = loader.get_package(args.package)
@@ -1030,25 +1337,28 @@ def cmd_info(args):
 		print(f"  version: {pkg.version}")
 		print(f"  homepage: {pkg.homepage}")
 		print(f"  license: {pkg.license}")
-		print(
-			f"  description: {pkg.description[:200]}..."
-			if len(pkg.description) > 200
-			else f"  description: {pkg.description}"
-		)
+		description = pkg.description
+		if len(description) > 200:
+			description = f"{description[:200]}..."
+		print(f"  description: {description}")
 	else:
 		print(f"Package '{args.package}' not found")
+		# The name may be a pname rather than an attr (e.g. "firefox" vs "nixos.firefox")
+		matches = loader.get_by_pname(args.package)
+		if matches:
+			print(f"Packages with pname '{args.package}': {', '.join(m.attr for m in matches)}")
 
 
 def cmd_match(args):
 	"""Test correlation for a specific Flathub ID."""
 	cache_dir = Path(args.cache_dir)
-	nixpkgs_data = Path(args.nixpkgs_data) if args.nixpkgs_data else None
-	loader = NixpkgsLoader(nixpkgs_data) if nixpkgs_data else NixpkgsLoader()
+	loader = NixpkgsLoader(Path(args.nixpkgs_data) if args.nixpkgs_data else DEFAULT_NIXPKGS_DATA)
 	fetcher = FlathubFetcher(cache_dir)
 	correlator = CorrelationEngine()
 
-	if args.mappings and Path(args.mappings).exists():
-		correlator.load_known_mappings(Path(args.mappings))
+	mappings_file = _resolve_optional(args.mappings)
+	if mappings_file:
+		correlator.load_known_mappings(mappings_file)
 
 	# Fetch Flathub data
 	print("Fetching Flathub data...")
@@ -1069,7 +1379,9 @@ def cmd_match(args):
 	nixpkgs_packages = loader.load()
 
 	# Try to correlate just this one
-	mappings = correlator.correlate({args.flathub_id: component}, nixpkgs_packages)
+	mappings = correlator.correlate(
+		{args.flathub_id: component}, nixpkgs_packages, indexes=loader.get_indexes()
+	)
 
 	if mappings:
 		m = mappings[0]
@@ -1095,13 +1407,13 @@ def cmd_match(args):
 def cmd_correlate(args):
 	"""Run correlation and generate report only."""
 	cache_dir = Path(args.cache_dir)
-	nixpkgs_data = Path(args.nixpkgs_data) if args.nixpkgs_data else None
-	loader = NixpkgsLoader(nixpkgs_data) if nixpkgs_data else NixpkgsLoader()
+	loader = NixpkgsLoader(Path(args.nixpkgs_data) if args.nixpkgs_data else DEFAULT_NIXPKGS_DATA)
 	fetcher = FlathubFetcher(cache_dir)
 	correlator = CorrelationEngine()
 
-	if args.mappings and Path(args.mappings).exists():
-		correlator.load_known_mappings(Path(args.mappings))
+	mappings_file = _resolve_optional(args.mappings)
+	if mappings_file:
+		correlator.load_known_mappings(mappings_file)
 
 	# Fetch and parse Flathub
 	print("Fetching Flathub data...")
@@ -1114,7 +1426,9 @@ def cmd_correlate(args):
 
 	# Run correlation
 	print("Running correlation...")
-	mappings = correlator.correlate(flathub_components, nixpkgs_packages)
+	mappings = correlator.correlate(
+		flathub_components, nixpkgs_packages, workers=args.jobs, indexes=loader.get_indexes()
+	)
 
 	# Generate report
 	output_path = Path(args.report)
@@ -1125,6 +1439,57 @@ def cmd_correlate(args):
 	print(f"Report written to: {output_path}")
 
 
+# Attrs of language package sets skipped by refresh, matched in a single pass.
+# python/perl prefixes only count with a later "Packages" (python3Packages, perl538Packages).
+MODULE_ATTR_RE = re.compile(
+	r"haskellPackages\.|nodePackages\.|rubyGems\.|(?:python|perl).*Packages", re.DOTALL
+)
+
+
+def _iter_nix_env_packages(nixpkgs_arg: list[str]):
+	"""
+	Stream (attr, data) pairs from `nix-env -qaP --json --meta`.
+
+	With ijson available, packages are yielded while nix-env is still writing, so
+	the full JSON document is never held in memory. Exits if nix-env is missing
+	or fails.
+
+	Args:
+		nixpkgs_arg: Extra nix-env arguments selecting the nixpkgs source
+
+	Yields:
+		Tuples of (attr, package data)
+	"""
+	# stderr goes to a file so a chatty evaluation can't stall the stdout pipe
+	with tempfile.TemporaryFile() as stderr_file:
+		try:
+			process = subprocess.Popen(
+				["nix-env", *nixpkgs_arg, "-qaP", "--json", "--meta"],
+				stdout=subprocess.PIPE,
+				stderr=stderr_file,
+			)
+		except FileNotFoundError:
+			print("Error: nix-env not found. Make sure Nix is installed.")
+			sys.exit(1)
+
+		with process:
+			try:
+				if ijson is not None:
+					yield from ijson.kvitems(process.stdout, "", use_float=True)
+				else:
+					yield from _loads_json(process.stdout.read()).items()
+			except Exception:
+				# Truncated output from a failed run is reported as the nix-env error below
+				process.stdout.close()
+				if process.wait() == 0:
+					raise
+
+			if process.wait() != 0:
+				stderr_file.seek(0)
+				print(f"Error querying nixpkgs: {stderr_file.read().decode(errors='replace')}")
+				sys.exit(1)
+
+
 def cmd_refresh(args):
 	"""Refresh nixpkgs-apps.json by querying local nixpkgs."""
 	print("Querying local nixpkgs for package metadata...")
@@ -1136,63 +1501,37 @@ def cmd_refresh(args):
 	if hasattr(args, "nixpkgs") and args.nixpkgs:
 		nixpkgs_arg = ["-f", args.nixpkgs]
 
-	try:
-		result = subprocess.run(
-			["nix-env", *nixpkgs_arg, "-qaP", "--json", "--meta"],
-			capture_output=True,
-			text=True,
-			check=True,
-		)
-	except subprocess.CalledProcessError as e:
-		print(f"Error querying nixpkgs: {e.stderr}")
-		sys.exit(1)
-	except FileNotFoundError:
-		print("Error: nix-env not found. Make sure Nix is installed.")
-		sys.exit(1)
-
-	raw_packages = json.loads(result.stdout)
-	print(f"Found {len(raw_packages)} total packages")
-
 	# Filter to likely GUI applications
 	# Heuristics: has a homepage, not a library (doesn't start with lib),
 	# not a font, not a -unwrapped variant, etc.
 	packages = {}
-	skipped = {"no_pname": 0, "library": 0, "font": 0, "unwrapped": 0, "module": 0}
+	# Skip counters are plain locals in the hot loop and packed into a dict afterwards
+	skipped_no_pname = skipped_library = skipped_font = skipped_unwrapped = skipped_module = 0
+	total_packages = 0
 
-	for attr, data in raw_packages.items():
+	for attr, data in _iter_nix_env_packages(nixpkgs_arg):
+		total_packages += 1
 		meta = data.get("meta", {})
 		pname = data.get("pname", "")
 
 		# Skip packages without pname
 		if not pname:
-			skipped["no_pname"] += 1
+			skipped_no_pname += 1
 			continue
 
 		# Skip obvious non-applications
 		pname_lower = pname.lower()
 		if pname_lower.startswith("lib") and not pname_lower.startswith("libre"):
-			skipped["library"] += 1
+			skipped_library += 1
 			continue
-		if "font" in pname_lower or pname_lower.endswith("-fonts"):
-			skipped["font"] += 1
+		if "font" in pname_lower:  # also covers "-fonts" sets
+			skipped_font += 1
 			continue
 		if pname_lower.endswith("-unwrapped"):
-			skipped["unwrapped"] += 1
-			continue
-		if attr.startswith("python") and "Packages" in attr:
-			skipped["module"] += 1
-			continue
-		if attr.startswith("perl") and "Packages" in attr:
-			skipped["module"] += 1
+			skipped_unwrapped += 1
 			continue
-		if attr.startswith("haskellPackages."):
-			skipped["module"] += 1
-			continue
-		if attr.startswith("nodePackages."):
-			skipped["module"] += 1
-			continue
-		if attr.startswith("rubyGems."):
-			skipped["module"] += 1
+		if MODULE_ATTR_RE.match(attr):
+			skipped_module += 1
 			continue
 
 		# Extract license info
@@ -1217,6 +1556,14 @@ def cmd_refresh(args):
 			"license": license_str,
 		}
 
+	skipped = {
+		"no_pname": skipped_no_pname,
+		"library": skipped_library,
+		"font": skipped_font,
+		"unwrapped": skipped_unwrapped,
+		"module": skipped_module,
+	}
+	print(f"Found {total_packages} total packages")
 	print(f"Filtered to {len(packages)} candidate applications")
 	print(f"Skipped: {skipped}")
 
@@ -1225,7 +1572,7 @@ def cmd_refresh(args):
 		"_meta": {
 			"generated": datetime.now(UTC).isoformat(),
 			"source": args.nixpkgs if hasattr(args, "nixpkgs") and args.nixpkgs else "default nixpkgs",
-			"total_packages": len(raw_packages),
+			"total_packages": total_packages,
 			"filtered_packages": len(packages),
 		},
 		"packages": packages,
@@ -1234,11 +1581,10 @@ def cmd_refresh(args):
 	# Write output
 	output_path = Path(args.output)
 	output_path.parent.mkdir(parents=True, exist_ok=True)
-	with open(output_path, "w") as f:
-		json.dump(output, f, indent=2)
+	_dump_json(output, output_path)
 
 	print(f"\nWrote {len(packages)} packages to {output_path}")
-	print(f"Total nixpkgs queried: {len(raw_packages)}")
+	print(f"Total nixpkgs queried: {total_packages}")
 
 
 def main():
@@ -1256,6 +1602,15 @@ def main():
 			help="Path to prepackaged nixpkgs JSON data",
 		)
 
+	def add_jobs_arg(p):
+		p.add_argument(
+			"-j",
+			"--jobs",
+			type=int,
+			default=1,
+			help="Worker processes used for correlation",
+		)
+
 	# Generate command
 	gen_parser = subparsers.add_parser("generate", help="Generate AppStream catalog")
 	gen_parser.add_argument(
@@ -1274,12 +1629,18 @@ def main():
 		action="store_true",
 		help="Skip downloading icons",
 	)
+	gen_parser.add_argument(
+		"--pretty",
+		action="store_true",
+		help="Indent the catalog XML for human inspection",
+	)
 	gen_parser.add_argument(
 		"--mappings",
 		default="known-mappings.json",
 		help="JSON file with known flathub_id -> nixpkgs attr mappings",
 	)
 	add_common_args(gen_parser)
+	add_jobs_arg(gen_parser)
 	gen_parser.set_defaults(func=cmd_generate)
 
 	# Info command - show info about a nixpkgs package
@@ -1323,6 +1684,7 @@ def main():
 		help="JSON file with known flathub_id -> nixpkgs attr mappings",
 	)
 	add_common_args(corr_parser)
+	add_jobs_arg(corr_parser)
 	corr_parser.set_defaults(func=cmd_correlate)
 
 	# Refresh command - regenerate nixpkgs-apps.json from local nixpkgs
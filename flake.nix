@@ -121,6 +121,11 @@
         pythonEnv = pkgs.python3.withPackages (ps: [
           ps.pytest
           ps.tldextract # For URL parsing in appstream module
+          ps.urllib3 # For pooled downloads in appstream module
+          ps.orjson # Optional: faster JSON I/O in appstream module
+          ps.lxml # Optional: faster XML parsing in appstream module
+          ps.isal # Optional: faster gzip compression in appstream module
+          ps.ijson # Optional: streaming nix-env output in appstream refresh
           # PackageKit has Python bindings in lib/python*/site-packages/
           # toPythonModule lets withPackages pick them up
           (ps.toPythonModule pkgs.packagekit)
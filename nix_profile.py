@@ -28,11 +28,24 @@ Version 3 (current, Nix 2.4+):
 
 from __future__ import annotations
 
+import functools
 import json
 import os
 import pwd
+import re
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Literal, TypedDict, cast
+from typing import Literal, TypedDict
+
+try:
+	import orjson
+except ImportError:
+	# orjson is an optional speedup; fall back to the stdlib json module
+	orjson = None
+
+# Last dash-separated component of a store path name that looks like a version:
+# it starts with a digit, or contains both a digit and a dot
+_VERSION_COMPONENT_RE = re.compile(r"(?:.*-|)(\d[^-]*|(?=[^-]*\d)[^-]*\.[^-]*)(?:-|$)", re.DOTALL)
 
 # =============================================================================
 # Type definitions for manifest.json structure
@@ -140,6 +153,160 @@ class LoadedManifest(TypedDict):
 
 	version: int
 	elements: NormalizedElements
+	# Element key -> simple package name
+	names: dict[str, str]
+	# Package name or element key -> element key (first element wins)
+	by_name: dict[str, str]
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+
+@functools.lru_cache(maxsize=8)
+def _lookup_user(uid: int) -> tuple[str, str]:
+	"""
+	Look up the user name and home directory for a UID.
+
+	The passwd lookup can go through NSS (SSSD/LDAP), so results are cached.
+
+	Args:
+		uid: User ID
+
+	Returns:
+		Tuple of (username, home directory)
+
+	Raises:
+		KeyError: If no user has this UID
+	"""
+	pw_entry = pwd.getpwuid(uid)
+	return pw_entry.pw_name, pw_entry.pw_dir
+
+
+def _walk_files(top: str) -> Iterator[str]:
+	"""
+	Recursively yield the files under a directory.
+
+	Entries are listed with os.scandir so the directory-entry type can be
+	used without a stat() per entry. Files in a directory come before the
+	contents of its subdirectories, and symlinked directories are not
+	descended into, matching Path.rglob("*"). Directories are walked with an
+	explicit stack, so deep trees don't chain nested generators.
+
+	Args:
+		top: Directory to walk
+
+	Yields:
+		File paths (including symlinks to files)
+	"""
+	stack = [top]
+	while stack:
+		try:
+			with os.scandir(stack.pop()) as it:
+				entries = list(it)
+		except OSError:
+			continue
+
+		subdirs = []
+		for entry in entries:
+			if entry.is_file():
+				yield entry.path
+			elif entry.is_dir(follow_symlinks=False):
+				subdirs.append(entry.path)
+
+		# Reversed so the first subdirectory is walked next
+		stack.extend(reversed(subdirs))
+
+
+def _get_package_name(pkg_key: str, element: ManifestElementV3) -> str:
+	"""
+	Extract the simple package name from an element.
+
+	For v3, attrPath is like "legacyPackages.x86_64-linux.firefox" -> "firefox"
+	For v2 (converted), attrPath is the simple name like "firefox"
+	"""
+	attr_path = element.get("attrPath", "")
+	if attr_path and "." in attr_path:
+		return attr_path.rpartition(".")[2]
+	return attr_path or pkg_key
+
+
+def _index_elements(version_num: int, elements: NormalizedElements) -> LoadedManifest:
+	"""
+	Build a LoadedManifest with package names and the name/key lookup index.
+
+	The first element claiming a name wins in the index, matching a
+	linear scan of the elements in manifest order.
+	"""
+	names: dict[str, str] = {}
+	by_name: dict[str, str] = {}
+	for pkg_key, element in elements.items():
+		pkg_name = _get_package_name(pkg_key, element)
+		names[pkg_key] = pkg_name
+		by_name.setdefault(pkg_name, pkg_key)
+		by_name.setdefault(pkg_key, pkg_key)
+	return {"version": version_num, "elements": elements, "names": names, "by_name": by_name}
+
+
+@functools.lru_cache(maxsize=4)
+def _read_manifest(path: str, stamp: tuple[int, int, int, int]) -> LoadedManifest | None:
+	"""
+	Read a manifest.json and normalize it to v3 format.
+
+	Results are shared by every NixProfile in the process. The stamp
+	(mtime_ns, ctime_ns, size, inode) is part of the cache key, so a changed
+	manifest is parsed again. ctime is needed because manifests live in
+	/nix/store, where every mtime is 1 and inodes are reused after GC.
+
+	Args:
+		path: Path to manifest.json
+		stamp: os.stat() (st_mtime_ns, st_ctime_ns, st_size, st_ino) of the file
+
+	Returns:
+		LoadedManifest, or None if the manifest can't be read or parsed.
+	"""
+	try:
+		with open(path, "rb") as f:
+			data = f.read()
+		manifest: Manifest = orjson.loads(data) if orjson is not None else json.loads(data)
+	except (OSError, ValueError):  # ValueError covers JSONDecodeError and bad UTF-8
+		return None
+
+	version_num = manifest.get("version", 1)
+	elements = manifest.get("elements", {})
+
+	if version_num >= 3 and isinstance(elements, dict):
+		# Already v3 format
+		return _index_elements(version_num, elements)
+
+	# Convert v2 (list) to v3 (dict) format
+	if not isinstance(elements, list):
+		return _index_elements(version_num, {})
+
+	normalized: NormalizedElements = {}
+	for i, element in enumerate(elements):
+		# Determine the package key
+		attr_path = element.get("attrPath", "")
+		if attr_path:
+			pkg_key = attr_path
+		else:
+			original_url = element.get("originalUrl", "")
+			if original_url and "#" in original_url:
+				pkg_key = original_url.split("#")[-1]
+			else:
+				pkg_key = f"element-{i}"
+
+		# Convert to v3 element format, keeping only the fields read downstream
+		# (absent "active" means active, and outputs/priority are never used)
+		normalized[pkg_key] = {
+			"attrPath": attr_path,
+			"originalUrl": element.get("originalUrl", ""),
+			"storePaths": element.get("storePaths", []),
+			"url": element.get("url", ""),
+		}
+
+	return _index_elements(version_num, normalized)
 
 
 # =============================================================================
@@ -166,6 +333,11 @@ class NixProfile:
 		self.profile_path = Path(profile_path)
 		self.manifest_path = self.profile_path / "manifest.json"
 
+		# Last loaded manifest with the (mtime_ns, ctime_ns, size, inode) it was read at
+		self._manifest_cache: tuple[tuple[int, int, int, int], LoadedManifest] | None = None
+		# Installed package versions and the loaded manifest they were built from
+		self._installed: tuple[LoadedManifest, dict[str, str]] | None = None
+
 	@staticmethod
 	def _resolve_user_profile() -> str:
 		"""
@@ -182,10 +354,7 @@ class NixProfile:
 		uid_str = os.environ.get("UID")
 		if uid_str:
 			try:
-				uid = int(uid_str)
-				pw_entry = pwd.getpwuid(uid)
-				username = pw_entry.pw_name
-				home_dir = pw_entry.pw_dir
+				username, home_dir = _lookup_user(int(uid_str))
 
 				# Try the user's home profile first
 				home_profile = os.path.join(home_dir, ".nix-profile")
@@ -206,6 +375,17 @@ class NixProfile:
 		username = os.environ.get("SUDO_USER") or os.environ.get("USER") or "root"
 		return f"/nix/var/nix/profiles/per-user/{username}/profile"
 
+	@property
+	def manifest(self) -> LoadedManifest | None:
+		"""The normalized manifest, loaded on first access and cached until it changes."""
+		return self._load_manifest()
+
+	def reload(self) -> None:
+		"""Drop the cached manifest so the next access re-reads it from disk."""
+		self._manifest_cache = None
+		self._installed = None
+		_read_manifest.cache_clear()
+
 	def _load_manifest(self) -> LoadedManifest | None:
 		"""
 		Load and normalize the manifest to v3 format.
@@ -213,67 +393,30 @@ class NixProfile:
 		This method handles both v2 (list-based) and v3 (dict-based) manifest
 		formats, normalizing v2 to v3 format for consistent downstream processing.
 
+		The result is cached and reused until the manifest file changes
+		(installing or removing packages switches the profile to a new manifest).
+
 		Returns:
 			LoadedManifest with normalized elements dict, or None if manifest
 			doesn't exist or can't be parsed.
 		"""
-		if not self.manifest_path.exists():
-			return None
-
 		try:
-			with open(self.manifest_path) as f:
-				manifest = cast(Manifest, json.load(f))
-		except (OSError, json.JSONDecodeError):
+			st = os.stat(self.manifest_path)
+		except OSError:
+			self._manifest_cache = None
 			return None
 
-		version_num = manifest.get("version", 1)
-		elements = manifest.get("elements", {})
-
-		if version_num >= 3 and isinstance(elements, dict):
-			# Already v3 format
-			return {"version": version_num, "elements": elements}
+		stamp = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+		if self._manifest_cache is not None and self._manifest_cache[0] == stamp:
+			return self._manifest_cache[1]
 
-		# Convert v2 (list) to v3 (dict) format
-		if not isinstance(elements, list):
-			return {"version": version_num, "elements": {}}
-
-		normalized: NormalizedElements = {}
-		for i, element in enumerate(elements):
-			# Determine the package key
-			attr_path = element.get("attrPath", "")
-			if attr_path:
-				pkg_key = attr_path
-			else:
-				original_url = element.get("originalUrl", "")
-				if original_url and "#" in original_url:
-					pkg_key = original_url.split("#")[-1]
-				else:
-					pkg_key = f"element-{i}"
-
-			# Convert to v3 element format
-			normalized[pkg_key] = {
-				"active": True,
-				"attrPath": attr_path,
-				"originalUrl": element.get("originalUrl", ""),
-				"outputs": None,
-				"priority": 5,
-				"storePaths": element.get("storePaths", []),
-				"url": element.get("url", ""),
-			}
+		loaded = self._parse_manifest(stamp)
+		self._manifest_cache = (stamp, loaded) if loaded is not None else None
+		return loaded
 
-		return {"version": version_num, "elements": normalized}
-
-	def _get_package_name(self, pkg_key: str, element: ManifestElementV3) -> str:
-		"""
-		Extract the simple package name from an element.
-
-		For v3, attrPath is like "legacyPackages.x86_64-linux.firefox" -> "firefox"
-		For v2 (converted), attrPath is the simple name like "firefox"
-		"""
-		attr_path = element.get("attrPath", "")
-		if attr_path and "." in attr_path:
-			return attr_path.split(".")[-1]
-		return attr_path or pkg_key
+	def _parse_manifest(self, stamp: tuple[int, int, int, int]) -> LoadedManifest | None:
+		"""Parse this profile's manifest, sharing results across instances."""
+		return _read_manifest(str(self.manifest_path), stamp)
 
 	def get_installed_packages(self) -> dict[str, str]:
 		"""
@@ -283,16 +426,23 @@ class NixProfile:
 			Dictionary mapping package attribute names to versions.
 			Example: {'firefox': '122.0', 'vim': '9.0.1'}
 		"""
-		loaded = self._load_manifest()
+		loaded = self.manifest
 		if not loaded:
 			return {}
 
+		if self._installed is None or self._installed[0] is not loaded:
+			self._installed = (loaded, self._collect_installed(loaded))
+		return dict(self._installed[1])
+
+	def _collect_installed(self, loaded: LoadedManifest) -> dict[str, str]:
+		"""Map the active elements' package names to their store path versions."""
+		names = loaded["names"]
 		packages = {}
 		for pkg_key, element in loaded["elements"].items():
 			if not element.get("active", True):
 				continue
 
-			pkg_name = self._get_package_name(pkg_key, element)
+			pkg_name = names[pkg_key]
 			store_paths = element.get("storePaths", [])
 			version = "unknown"
 
@@ -314,16 +464,11 @@ class NixProfile:
 			Package key name (str) for use with nix profile remove/upgrade,
 			or None if not found.
 		"""
-		loaded = self._load_manifest()
+		loaded = self.manifest
 		if not loaded:
 			return None
 
-		for pkg_key, element in loaded["elements"].items():
-			pkg_name = self._get_package_name(pkg_key, element)
-			if pkg_name == package_name or pkg_key == package_name:
-				return pkg_key
-
-		return None
+		return loaded["by_name"].get(package_name)
 
 	def get_package_info(self, package_name: str) -> PackageInfo | None:
 		"""
@@ -335,21 +480,21 @@ class NixProfile:
 		Returns:
 			PackageInfo dict or None if not found
 		"""
-		loaded = self._load_manifest()
+		loaded = self.manifest
 		if not loaded:
 			return None
 
-		for pkg_key, element in loaded["elements"].items():
-			pkg_name = self._get_package_name(pkg_key, element)
-			if pkg_name == package_name or pkg_key == package_name:
-				return {
-					"attrPath": element.get("attrPath", ""),
-					"originalUrl": element.get("originalUrl", ""),
-					"storePaths": element.get("storePaths", []),
-					"url": element.get("url", ""),
-				}
+		pkg_key = loaded["by_name"].get(package_name)
+		if pkg_key is None:
+			return None
 
-		return None
+		element = loaded["elements"][pkg_key]
+		return {
+			"attrPath": element.get("attrPath", ""),
+			"originalUrl": element.get("originalUrl", ""),
+			"storePaths": element.get("storePaths", []),
+			"url": element.get("url", ""),
+		}
 
 	def _extract_name_from_url(self, url: str) -> str:
 		"""
@@ -376,54 +521,30 @@ class NixProfile:
 		Returns:
 			Version string or 'unknown'
 		"""
-		try:
-			# Get the last component of the path
-			basename = Path(store_path).name
-
-			# Remove hash prefix (everything before first -)
-			if "-" not in basename:
-				return "unknown"
-
-			parts = basename.split("-", 1)
-			if len(parts) < 2:
-				return "unknown"
-
-			name_version = parts[1]
-
-			# Try to separate name from version
-			# Common patterns:
-			# - firefox-122.0
-			# - python3.11-numpy-1.24.3
-			# - vim-9.0.1
-
-			# If package_name is in the string, try to extract what comes after
-			if package_name in name_version:
-				# Find the package name and get the rest
-				idx = name_version.find(package_name)
-				if idx != -1:
-					remainder = name_version[idx + len(package_name) :]
-					# Remove leading dash if present
-					if remainder.startswith("-"):
-						remainder = remainder[1:]
-
-					# The version is usually the first component
-					if remainder:
-						# Split on dash and take first part as version
-						version = remainder.split("-")[0]
-						if version:
-							return version
-
-			# Fallback: try to find version-like patterns (numbers and dots)
-			parts = name_version.split("-")
-			for part in reversed(parts):
-				# Check if this part looks like a version
-				if any(c.isdigit() for c in part) and ("." in part or part[0].isdigit()):
-					return part
-
-			return "unknown"
-
-		except Exception:
+		# Drop the directory and the hash prefix (everything up to the first -)
+		basename = store_path.rstrip("/").rpartition("/")[2]
+		if "-" not in basename:
 			return "unknown"
+		name_version = basename.partition("-")[2]
+
+		# Common patterns:
+		# - firefox-122.0
+		# - python3.11-numpy-1.24.3
+		# - vim-9.0.1
+
+		# If package_name is in the string, the version is the component after it
+		idx = name_version.find(package_name)
+		if idx != -1:
+			remainder = name_version[idx + len(package_name) :]
+			if remainder.startswith("-"):
+				remainder = remainder[1:]
+			version = remainder.partition("-")[0]
+			if version:
+				return version
+
+		# Fallback: the last version-like component (numbers and dots)
+		match = _VERSION_COMPONENT_RE.match(name_version)
+		return match.group(1) if match else "unknown"
 
 	def get_package_files(self, package_name: str) -> list[str]:
 		"""
@@ -438,39 +559,50 @@ class NixProfile:
 		Returns:
 			List of file paths
 		"""
+		return list(self.iter_package_files(package_name))
+
+	def iter_package_files(self, package_name: str) -> Iterator[str]:
+		"""
+		Lazily yield the files listed by get_package_files().
+
+		Directories are only read as far as the caller iterates, so callers
+		that stop at the first match skip the rest (notably the icons tree).
+
+		Args:
+			package_name: Package attribute name
+
+		Yields:
+			File paths: desktop files, then binaries, then icons, per store path
+		"""
 		info = self.get_package_info(package_name)
 		if not info:
-			return []
+			return
 
-		files = []
 		store_paths = info.get("storePaths", [])
 
+		# Missing directories are the exception, so list them directly rather
+		# than stat()ing each one first
 		for store_path in store_paths:
-			store_dir = Path(store_path)
-			if not store_dir.exists():
-				continue
-
 			# List desktop files (important for GNOME Software launch button)
-			apps_dir = store_dir / "share" / "applications"
-			if apps_dir.exists():
-				for desktop_file in apps_dir.glob("*.desktop"):
-					files.append(str(desktop_file))
+			try:
+				with os.scandir(os.path.join(store_path, "share", "applications")) as entries:
+					for entry in entries:
+						if entry.name.endswith(".desktop"):
+							yield entry.path
+			except (FileNotFoundError, NotADirectoryError):
+				pass
 
 			# List binaries
-			bin_dir = store_dir / "bin"
-			if bin_dir.exists():
-				for binary in bin_dir.iterdir():
-					if binary.is_file():
-						files.append(str(binary))
+			try:
+				with os.scandir(os.path.join(store_path, "bin")) as entries:
+					for entry in entries:
+						if entry.is_file():
+							yield entry.path
+			except (FileNotFoundError, NotADirectoryError):
+				pass
 
 			# List icons (useful for app display)
-			icons_dir = store_dir / "share" / "icons"
-			if icons_dir.exists():
-				for icon in icons_dir.rglob("*"):
-					if icon.is_file():
-						files.append(str(icon))
-
-		return files
+			yield from _walk_files(os.path.join(store_path, "share", "icons"))
 
 	def get_desktop_file(self, package_name: str) -> str | None:
 		"""
@@ -487,25 +619,32 @@ class NixProfile:
 			return None
 
 		store_paths = info.get("storePaths", [])
+		name_lower = package_name.lower()
 
 		for store_path in store_paths:
-			apps_dir = Path(store_path) / "share" / "applications"
-			if apps_dir.exists():
-				# Look for a desktop file matching the package name first
-				for desktop_file in apps_dir.glob("*.desktop"):
-					# Prefer files that match the package name
-					if package_name.lower() in desktop_file.name.lower():
-						return str(desktop_file)
-
-				# Fall back to first desktop file found
-				for desktop_file in apps_dir.glob("*.desktop"):
-					return str(desktop_file)
+			first_desktop_file = None
+			try:
+				with os.scandir(os.path.join(store_path, "share", "applications")) as entries:
+					for entry in entries:
+						if not entry.name.endswith(".desktop"):
+							continue
+						# Prefer files that match the package name
+						if name_lower in entry.name.lower():
+							return entry.path
+						if first_desktop_file is None:
+							first_desktop_file = entry.path
+			except (FileNotFoundError, NotADirectoryError):
+				continue
+
+			# Fall back to first desktop file found
+			if first_desktop_file is not None:
+				return first_desktop_file
 
 		return None
 
 	def is_empty(self) -> bool:
 		"""Check if the profile is empty or doesn't exist."""
-		loaded = self._load_manifest()
+		loaded = self.manifest
 		if not loaded:
 			return True
 		return len(loaded["elements"]) == 0
@@ -29,11 +29,14 @@ Backend name: nix-profile
 
 import json
 import os
+import re
+import selectors
 import subprocess
 import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from packagekit.backend import PackageKitBaseBackend, get_package_id, split_package_id
+from packagekit.backend import PackageKitBaseBackend, split_package_id
 from packagekit.enums import (
 	# Errors
 	ERROR_INTERNAL_ERROR,
@@ -73,10 +76,79 @@ from packagekit.enums import (
 )
 from packagekit.package import PackagekitPackage
 
+try:
+	import orjson
+except ImportError:
+	# orjson is an optional speedup; fall back to the stdlib json module
+	orjson = None
+
 # Import helper modules
 from nix_profile import NixProfile
 from nix_search import NixSearch
 
+# Concurrent nix-search queries when looking up metadata for many packages
+METADATA_LOOKUP_WORKERS = 8
+
+# Chunk size for reading nix's stdout/stderr pipes
+NIX_OUTPUT_READ_SIZE = 65536
+
+# Appdata categories -> PackageKit groups
+CATEGORY_TO_GROUP = {
+	"AudioVideo": GROUP_MULTIMEDIA,
+	"Audio": GROUP_MULTIMEDIA,
+	"Video": GROUP_MULTIMEDIA,
+	"Development": GROUP_PROGRAMMING,
+	"Education": GROUP_EDUCATION,
+	"Game": GROUP_GAMES,
+	"Graphics": GROUP_GRAPHICS,
+	"Network": GROUP_INTERNET,
+	"Office": GROUP_OFFICE,
+	"Science": GROUP_SCIENCE,
+	"Settings": GROUP_ADMIN_TOOLS,
+	"System": GROUP_SYSTEM,
+	"Utility": GROUP_ACCESSORIES,
+}
+
+# PackageKit groups -> appdata categories
+GROUP_TO_CATEGORIES = {
+	GROUP_MULTIMEDIA: ["AudioVideo", "Audio", "Video"],
+	GROUP_PROGRAMMING: ["Development"],
+	GROUP_EDUCATION: ["Education"],
+	GROUP_GAMES: ["Game"],
+	GROUP_GRAPHICS: ["Graphics"],
+	GROUP_INTERNET: ["Network"],
+	GROUP_OFFICE: ["Office"],
+	GROUP_SCIENCE: ["Science"],
+	GROUP_ADMIN_TOOLS: ["Settings", "System"],
+	GROUP_ACCESSORIES: ["Utility"],
+}
+
+# Line prefixes of nix's internal-json log events on stderr
+_NIX_LOG_PREFIXES = ("@nix ", '{"action"')
+_NIX_LOG_PREFIXES_BYTES = tuple(prefix.encode() for prefix in _NIX_LOG_PREFIXES)
+
+
+def _short_summary(metadata: dict, max_length: int = 100) -> str:
+	"""
+	Get a package's one-line summary from its metadata, truncated for display.
+
+	Args:
+		metadata: Package metadata (falls back to the description without a summary)
+		max_length: Longest summary to return, including the "..." suffix
+
+	Returns:
+		Summary string
+	"""
+	summary = metadata["summary"] if "summary" in metadata else metadata.get("description", "")
+	if len(summary) > max_length:
+		return summary[: max_length - 3] + "..."
+	return summary
+
+
+def _is_nix_log_line(line: str) -> bool:
+	"""Check whether a stripped stderr line is an internal-json log event."""
+	return line.startswith(_NIX_LOG_PREFIXES)
+
 
 class NixLogParser:
 	"""
@@ -92,12 +164,20 @@ class NixLogParser:
 			callback: Function to call with progress info: callback(percent, status_msg)
 		"""
 		self.callback = callback
-		self.activity_stack = []
+		# Running activities by id
+		self.activities: dict[int, dict] = {}
 
-	def parse_line(self, line: str):
+	def parse_line(self, line: str | bytes):
 		"""Parse a single line of JSON log output."""
+		# Log lines are "@nix {...}"; reject anything else before paying for a
+		# failed JSON parse
+		if line[:5] in ("@nix ", b"@nix "):
+			line = line[5:]
+		elif line[:1] not in ("{", b"{"):
+			return
+
 		try:
-			data = json.loads(line)
+			data = orjson.loads(line) if orjson is not None else json.loads(line)
 			action = data.get("action")
 
 			if action == "start":
@@ -109,7 +189,7 @@ class NixLogParser:
 			elif action == "msg":
 				self._handle_msg(data)
 
-		except (json.JSONDecodeError, KeyError):
+		except (ValueError, KeyError):  # ValueError covers both JSONDecodeError types
 			# Not all lines are JSON, skip non-JSON output
 			pass
 
@@ -119,21 +199,21 @@ class NixLogParser:
 		text = data.get("text", "")
 		parent = data.get("parent")
 
-		self.activity_stack.append({"id": activity_id, "text": text, "parent": parent})
+		self.activities[activity_id] = {"id": activity_id, "text": text, "parent": parent}
 
 		# Estimate progress based on activity depth
-		progress = min(20 + len(self.activity_stack) * 10, 90)
+		progress = min(20 + len(self.activities) * 10, 90)
 		self.callback(progress, text)
 
 	def _handle_stop(self, data):
 		"""Handle activity stop."""
 		activity_id = data.get("id")
 
-		# Remove from stack
-		self.activity_stack = [a for a in self.activity_stack if a["id"] != activity_id]
+		# Remove from running activities
+		self.activities.pop(activity_id, None)
 
 		# Update progress
-		progress = min(20 + len(self.activity_stack) * 10, 95)
+		progress = min(20 + len(self.activities) * 10, 95)
 		self.callback(progress, "Processing...")
 
 	def _handle_result(self, data):
@@ -175,12 +255,21 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		# Initialize nix search for package lookups
 		self.nix_search = NixSearch()
 
-		# Cache for package metadata
-		self._metadata_cache = {}
-
 		# Lock for thread-safe operations
 		self._lock = threading.Lock()
 
+		# Build environment with NIXPKGS_ALLOW_* variables once; every nix command uses it
+		# PackageKit runs as a system daemon and doesn't have user environment variables,
+		# so we must explicitly set them to allow unfree/insecure packages
+		self._nix_env = os.environ.copy()
+
+		# Always allow unfree packages (like user's shell environment would)
+		self._nix_env["NIXPKGS_ALLOW_UNFREE"] = "1"
+
+		# Also allow insecure packages if not already denied
+		if "NIXPKGS_ALLOW_INSECURE" not in self._nix_env:
+			self._nix_env["NIXPKGS_ALLOW_INSECURE"] = "1"
+
 	def _run_nix_command(
 		self, args: list[str], parse_json: bool = True, use_profile: bool = True
 	) -> tuple[int, str, str]:
@@ -209,52 +298,35 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 			cmd.insert(4, self._profile_path)
 			cmd.insert(5, "--impure")
 
-		if parse_json and "--log-format" not in " ".join(args):
+		if parse_json and "--log-format" not in args:
 			cmd.extend(["--log-format", "internal-json"])
 
-		# Build environment with NIXPKGS_ALLOW_* variables
-		# PackageKit runs as a system daemon and doesn't have user environment variables,
-		# so we must explicitly set them to allow unfree/insecure packages
-		env = os.environ.copy()
-
-		# Always allow unfree packages (like user's shell environment would)
-		env["NIXPKGS_ALLOW_UNFREE"] = "1"
-
-		# Also allow insecure packages if not already denied
-		if "NIXPKGS_ALLOW_INSECURE" not in env:
-			env["NIXPKGS_ALLOW_INSECURE"] = "1"
-
 		try:
 			process = subprocess.Popen(
 				cmd,
 				stdout=subprocess.PIPE,
 				stderr=subprocess.PIPE,
-				universal_newlines=True,
-				bufsize=1,
-				env=env,
+				env=self._nix_env,
 			)
 
-			stdout_lines = []
+			# Human-readable stderr lines; JSON log lines go to the parser instead
 			stderr_lines = []
 
-			if parse_json:
+			if parse_json and process.stderr:
 				parser = NixLogParser(self._update_progress)
+				stdout_bytes = self._stream_nix_output(process, parser, stderr_lines)
+				process.wait()
+				stdout = stdout_bytes.decode("utf-8", "replace")
+			else:
+				stdout_bytes, stderr_bytes = process.communicate()
+				stdout = stdout_bytes.decode("utf-8", "replace")
 
-				# Read stderr (where nix logs go) line by line
-				if process.stderr:
-					for line in process.stderr:
-						stderr_lines.append(line)
-						parser.parse_line(line.strip())
-
-			stdout, remaining_stderr = process.communicate()
-			stdout_lines.append(stdout)
-			stderr_lines.append(remaining_stderr)
-
-			# Filter out JSON log lines from stderr to get clean error messages
-			raw_stderr = "".join(stderr_lines)
-			filtered_stderr = self._filter_nix_stderr(raw_stderr)
+				# Filter out JSON log lines from stderr to get clean error messages
+				remaining_filtered = self._filter_nix_stderr(stderr_bytes.decode("utf-8", "replace"))
+				if remaining_filtered:
+					stderr_lines.append(remaining_filtered)
 
-			return (process.returncode, "".join(stdout_lines), filtered_stderr)
+			return (process.returncode, stdout, "\n".join(stderr_lines))
 
 		except FileNotFoundError:
 			self.error(ERROR_INTERNAL_ERROR, "nix command not found. Is Nix installed?")
@@ -263,6 +335,64 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 			self.error(ERROR_INTERNAL_ERROR, f"Failed to run nix command: {e!s}")
 			return (1, "", str(e))
 
+	def _stream_nix_output(self, process, parser: NixLogParser, stderr_lines: list[str]) -> bytes:
+		"""
+		Read a running nix command's stdout and stderr until both are closed.
+
+		Both pipes are drained together with a selector, in large chunks, so
+		nix never blocks on a full stdout pipe while we're busy with the
+		stderr log stream. stderr is split into lines as it arrives: log
+		events are parsed from bytes and only error messages are decoded.
+
+		Args:
+			process: Popen object with binary stdout and stderr pipes
+			parser: Parser fed the internal-json log events
+			stderr_lines: List the human-readable stderr lines are appended to
+
+		Returns:
+			The complete stdout output
+		"""
+
+		def handle_stderr_line(line: bytes):
+			stripped = line.strip()
+			if stripped.startswith(_NIX_LOG_PREFIXES_BYTES):
+				parser.parse_line(stripped)
+			elif stripped:
+				stderr_lines.append(line.rstrip(b"\r").decode("utf-8", "replace"))
+
+		stdout_fd = process.stdout.fileno()
+		stderr_fd = process.stderr.fileno()
+		stdout_chunks = []
+		partial_line = b""
+
+		with selectors.DefaultSelector() as selector:
+			for fd in (stdout_fd, stderr_fd):
+				os.set_blocking(fd, False)
+				selector.register(fd, selectors.EVENT_READ)
+
+			while selector.get_map():
+				for key, _events in selector.select():
+					try:
+						chunk = os.read(key.fd, NIX_OUTPUT_READ_SIZE)
+					except BlockingIOError:
+						continue
+					if not chunk:
+						selector.unregister(key.fd)
+					elif key.fd == stdout_fd:
+						stdout_chunks.append(chunk)
+					else:
+						# Keep the trailing partial line until the rest arrives
+						*lines, partial_line = (partial_line + chunk).split(b"\n")
+						for line in lines:
+							handle_stderr_line(line)
+
+		if partial_line:
+			handle_stderr_line(partial_line)
+
+		process.stdout.close()
+		process.stderr.close()
+		return b"".join(stdout_chunks)
+
 	def _update_progress(self, percent: int | None, message: str):
 		"""Update progress during nix operations."""
 		if percent is not None:
@@ -287,11 +417,8 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		filtered_lines = []
 		for line in stderr.splitlines():
 			stripped = line.strip()
-			# Skip JSON log lines (start with @nix or are JSON objects)
-			if stripped.startswith("@nix ") or stripped.startswith('{"action"'):
-				continue
-			# Skip empty lines
-			if not stripped:
+			# Skip JSON log lines and empty lines
+			if not stripped or _is_nix_log_line(stripped):
 				continue
 			filtered_lines.append(line)
 
@@ -304,30 +431,52 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		Format: name;version;arch;data
 		For nix: name;version;noarch;nixpkgs
 		"""
-		return get_package_id(pkg_name, version or "unknown", arch, "nixpkgs")
+		# Inlined equivalent of get_package_id(); this runs once per emitted package
+		return f"{pkg_name};{version or 'unknown'};{arch};nixpkgs"
 
 	def _parse_package_id(self, package_id: str) -> list[str]:
 		"""Parse a PackageKit package ID into [name, version, arch, data]."""
 		return split_package_id(package_id)
 
+	def _find_profile_elements(self, package_ids) -> list[tuple[str, str, str]]:
+		"""
+		Look up the profile elements for installed packages.
+
+		Reports ERROR_PACKAGE_NOT_FOUND for packages that aren't in the profile.
+
+		Args:
+			package_ids: PackageKit package IDs
+
+		Returns:
+			List of (pkg_name, version, element_index) for the packages found
+		"""
+		packages = []
+		for package_id in package_ids:
+			pkg_name, version, _arch, _data = self._parse_package_id(package_id)
+
+			element_index = self.profile.find_package_index(pkg_name)
+			if element_index is None:
+				self.error(ERROR_PACKAGE_NOT_FOUND, f"Package {pkg_name} not found in profile")
+				continue
+
+			packages.append((pkg_name, version, str(element_index)))
+
+		return packages
+
 	def _get_package_metadata(self, pkg_name: str) -> dict | None:
 		"""
 		Get package metadata from appdata cache.
 
+		NixSearch keeps a bounded, thread-safe cache of these lookups, so this
+		may be called from the thread pools in get_updates and resolve.
+
 		Args:
 			pkg_name: Package attribute name (e.g., 'firefox', 'python3')
 
 		Returns:
 			Dictionary with package metadata or None
 		"""
-		if pkg_name in self._metadata_cache:
-			return self._metadata_cache[pkg_name]
-
-		metadata = self.nix_search.get_package_info(pkg_name)
-		if metadata:
-			self._metadata_cache[pkg_name] = metadata
-
-		return metadata
+		return self.nix_search.get_package_info(pkg_name)
 
 	def _emit_package(self, pkg_name: str, version: str, info_type: str):
 		"""
@@ -342,12 +491,7 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 
 		# Get metadata for summary
 		metadata = self._get_package_metadata(pkg_name)
-		summary = ""
-		if metadata:
-			summary = metadata.get("summary", metadata.get("description", ""))
-			# Truncate long summaries
-			if len(summary) > 100:
-				summary = summary[:97] + "..."
+		summary = _short_summary(metadata) if metadata else ""
 
 		self.package(package_id, info_type, summary)
 
@@ -424,25 +568,9 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 
 	def _map_category_to_group(self, categories: list[str]) -> str:
 		"""Map appdata categories to PackageKit groups."""
-		category_map = {
-			"AudioVideo": GROUP_MULTIMEDIA,
-			"Audio": GROUP_MULTIMEDIA,
-			"Video": GROUP_MULTIMEDIA,
-			"Development": GROUP_PROGRAMMING,
-			"Education": GROUP_EDUCATION,
-			"Game": GROUP_GAMES,
-			"Graphics": GROUP_GRAPHICS,
-			"Network": GROUP_INTERNET,
-			"Office": GROUP_OFFICE,
-			"Science": GROUP_SCIENCE,
-			"Settings": GROUP_ADMIN_TOOLS,
-			"System": GROUP_SYSTEM,
-			"Utility": GROUP_ACCESSORIES,
-		}
-
 		for category in categories:
-			if category in category_map:
-				return category_map[category]
+			if category in CATEGORY_TO_GROUP:
+				return CATEGORY_TO_GROUP[category]
 
 		return GROUP_UNKNOWN
 
@@ -497,25 +625,27 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 			self.percentage(100)
 			return
 
-		# Check each package for updates
+		# Check each package for updates. Each metadata lookup is a nix-search
+		# query, so run them concurrently and consume the results in order
 		total = len(installed)
-		for i, (pkg_name, current_version) in enumerate(installed.items()):
-			# Get latest version from appdata
-			metadata = self._get_package_metadata(pkg_name)
-
-			if metadata:
-				latest_version = metadata.get("version", "")
+		with ThreadPoolExecutor(max_workers=METADATA_LOOKUP_WORKERS) as executor:
+			all_metadata = executor.map(self._get_package_metadata, installed)
+			for i, ((pkg_name, current_version), metadata) in enumerate(
+				zip(installed.items(), all_metadata, strict=True)
+			):
+				if metadata:
+					latest_version = metadata.get("version", "")
 
-				# Simple version comparison (nix versions can be complex)
-				# Note: versions are already normalized by nix_search module
-				if latest_version and latest_version != current_version:
-					package_id = self._pkg_to_package_id(pkg_name, latest_version)
-					summary = metadata.get("summary", "")
-					self.package(package_id, INFO_NORMAL, summary)
+					# Simple version comparison (nix versions can be complex)
+					# Note: versions are already normalized by nix_search module
+					if latest_version and latest_version != current_version:
+						package_id = self._pkg_to_package_id(pkg_name, latest_version)
+						summary = metadata.get("summary", "")
+						self.package(package_id, INFO_NORMAL, summary)
 
-			# Update progress
-			percent = int((i + 1) / total * 100)
-			self.percentage(percent)
+				# Update progress
+				percent = int((i + 1) / total * 100)
+				self.percentage(percent)
 
 	def install_files(self, only_trusted, files):
 		"""Install local .drv or .nix files."""
@@ -530,27 +660,29 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		self.percentage(0)
 		self.allow_cancel(False)
 
-		for package_id in package_ids:
-			pkg_name, version, _arch, _data = self._parse_package_id(package_id)
-
-			self.status(STATUS_INSTALL)
-			self.percentage(10)
+		packages = [self._parse_package_id(package_id)[:2] for package_id in package_ids]
+		if not packages:
+			return
 
-			# Construct the installable (nixpkgs#package)
-			installable = f"nixpkgs#{pkg_name}"
+		self.percentage(10)
 
-			# Run nix profile install
-			rc, _stdout, stderr = self._run_nix_command(["profile", "add", installable])
+		# Install everything in one nix invocation (installables are nixpkgs#package)
+		# so nix starts up and evaluates nixpkgs once, not once per package
+		installables = [f"nixpkgs#{pkg_name}" for pkg_name, _version in packages]
+		rc, _stdout, stderr = self._run_nix_command(["profile", "add", *installables])
 
-			if rc == 0:
-				self.percentage(100)
-				# Re-emit the package as installed
+		if rc == 0:
+			self.profile.reload()
+			self.percentage(100)
+			# Re-emit the packages as installed
+			for pkg_name, version in packages:
 				self._emit_package(pkg_name, version, INFO_INSTALLED)
-			else:
-				self.error(
-					ERROR_PACKAGE_FAILED_TO_INSTALL,
-					f"Failed to install {pkg_name}: {stderr}",
-				)
+		else:
+			pkg_names = ", ".join(pkg_name for pkg_name, _version in packages)
+			self.error(
+				ERROR_PACKAGE_FAILED_TO_INSTALL,
+				f"Failed to install {pkg_names}: {stderr}",
+			)
 
 	def refresh_cache(self, force):
 		"""Refresh the package cache and appdata."""
@@ -573,30 +705,27 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		self.percentage(0)
 		self.allow_cancel(False)
 
-		for package_id in package_ids:
-			pkg_name, version, _arch, _data = self._parse_package_id(package_id)
-
-			self.status(STATUS_REMOVE)
-			self.percentage(10)
-
-			# Find the profile element index for this package
-			element_index = self.profile.find_package_index(pkg_name)
+		packages = self._find_profile_elements(package_ids)
+		if not packages:
+			return
 
-			if element_index is None:
-				self.error(ERROR_PACKAGE_NOT_FOUND, f"Package {pkg_name} not found in profile")
-				continue
+		self.percentage(10)
 
-			# Run nix profile remove
-			rc, _stdout, stderr = self._run_nix_command(["profile", "remove", str(element_index)])
+		# Remove everything in one nix invocation
+		element_indexes = [element_index for _pkg_name, _version, element_index in packages]
+		rc, _stdout, stderr = self._run_nix_command(["profile", "remove", *element_indexes])
 
-			if rc == 0:
-				self.percentage(100)
+		if rc == 0:
+			self.profile.reload()
+			self.percentage(100)
+			for pkg_name, version, _element_index in packages:
 				self._emit_package(pkg_name, version, INFO_REMOVING)
-			else:
-				self.error(
-					ERROR_PACKAGE_FAILED_TO_REMOVE,
-					f"Failed to remove {pkg_name}: {stderr}",
-				)
+		else:
+			pkg_names = ", ".join(pkg_name for pkg_name, _version, _element_index in packages)
+			self.error(
+				ERROR_PACKAGE_FAILED_TO_REMOVE,
+				f"Failed to remove {pkg_names}: {stderr}",
+			)
 
 	def resolve(self, filters, packages):
 		"""Resolve package names to package IDs."""
@@ -606,6 +735,13 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		# Check if package is installed
 		installed = self.profile.get_installed_packages()
 
+		# Look up the packages that aren't installed in nixpkgs concurrently,
+		# since each lookup is a nix-search query
+		not_installed = list(dict.fromkeys(name for name in packages if name not in installed))
+		with ThreadPoolExecutor(max_workers=METADATA_LOOKUP_WORKERS) as executor:
+			all_metadata = executor.map(self._get_package_metadata, not_installed)
+			metadata_by_name = dict(zip(not_installed, all_metadata, strict=True))
+
 		for package_name in packages:
 			if package_name in installed:
 				# Package is installed - use efficient method
@@ -613,7 +749,7 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 				self._emit_installed_package(package_name, version, INFO_INSTALLED)
 			else:
 				# Check if package exists in nixpkgs via appdata
-				metadata = self._get_package_metadata(package_name)
+				metadata = metadata_by_name[package_name]
 				if metadata:
 					version = metadata.get("version", "unknown")
 					self._emit_package(package_name, version, INFO_AVAILABLE)
@@ -641,10 +777,7 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 
 			# Use metadata from search results directly instead of re-fetching
 			package_id = self._pkg_to_package_id(pkg_name, version)
-			summary = metadata.get("summary", metadata.get("description", ""))
-			if len(summary) > 100:
-				summary = summary[:97] + "..."
-			self.package(package_id, info_type, summary)
+			self.package(package_id, info_type, _short_summary(metadata))
 
 			percent = int((i + 1) / total * 100) if total > 0 else 100
 			self.percentage(percent)
@@ -658,19 +791,21 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		self.percentage(0)
 		self.allow_cancel(True)
 
-		search_terms = [v.lower() for v in values]
 		installed = self.profile.get_installed_packages()
 
+		# One alternation of all terms matches a path in a single regex scan
+		# instead of one substring search per term
+		search_terms = [re.escape(v.lower()) for v in values]
+		matches_term = re.compile("|".join(search_terms)).search if search_terms else None
+
 		total = len(installed)
 		for i, (pkg_name, version) in enumerate(installed.items()):
-			files = self.profile.get_package_files(pkg_name)
-
-			# Check if any file matches search terms
-			for filepath in files:
-				filename = filepath.lower()
-				if any(term in filename for term in search_terms):
-					self._emit_package(pkg_name, version, INFO_INSTALLED)
-					break  # Only emit package once
+			# Check if any file matches search terms, stopping at the first hit
+			if matches_term is not None:
+				for filepath in self.profile.iter_package_files(pkg_name):
+					if matches_term(filepath.lower()):
+						self._emit_package(pkg_name, version, INFO_INSTALLED)
+						break  # Only emit package once
 
 			percent = int((i + 1) / total * 100) if total > 0 else 100
 			self.percentage(percent)
@@ -681,24 +816,10 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		self.percentage(0)
 		self.allow_cancel(True)
 
-		# Map PackageKit groups to appdata categories
-		group_to_category = {
-			GROUP_MULTIMEDIA: ["AudioVideo", "Audio", "Video"],
-			GROUP_PROGRAMMING: ["Development"],
-			GROUP_EDUCATION: ["Education"],
-			GROUP_GAMES: ["Game"],
-			GROUP_GRAPHICS: ["Graphics"],
-			GROUP_INTERNET: ["Network"],
-			GROUP_OFFICE: ["Office"],
-			GROUP_SCIENCE: ["Science"],
-			GROUP_ADMIN_TOOLS: ["Settings", "System"],
-			GROUP_ACCESSORIES: ["Utility"],
-		}
-
 		categories = []
 		for group in values:
-			if group in group_to_category:
-				categories.extend(group_to_category[group])
+			if group in GROUP_TO_CATEGORIES:
+				categories.extend(GROUP_TO_CATEGORIES[group])
 
 		if not categories:
 			return
@@ -720,10 +841,7 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 
 			# Use metadata from search results directly instead of re-fetching
 			package_id = self._pkg_to_package_id(pkg_name, version)
-			summary = metadata.get("summary", metadata.get("description", ""))
-			if len(summary) > 100:
-				summary = summary[:97] + "..."
-			self.package(package_id, info_type, summary)
+			self.package(package_id, info_type, _short_summary(metadata))
 
 			percent = int((i + 1) / total * 100) if total > 0 else 100
 			self.percentage(percent)
@@ -751,10 +869,7 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 
 			# Use metadata from search results directly instead of re-fetching
 			package_id = self._pkg_to_package_id(pkg_name, version)
-			summary = metadata.get("summary", metadata.get("description", ""))
-			if len(summary) > 100:
-				summary = summary[:97] + "..."
-			self.package(package_id, info_type, summary)
+			self.package(package_id, info_type, _short_summary(metadata))
 
 			percent = int((i + 1) / total * 100) if total > 0 else 100
 			self.percentage(percent)
@@ -765,33 +880,29 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		self.percentage(0)
 		self.allow_cancel(False)
 
-		for package_id in package_ids:
-			pkg_name, version, _arch, _data = self._parse_package_id(package_id)
-
-			self.status(STATUS_UPDATE)
-			self.percentage(10)
-
-			# Find the profile element index
-			element_index = self.profile.find_package_index(pkg_name)
+		packages = self._find_profile_elements(package_ids)
+		if not packages:
+			return
 
-			if element_index is None:
-				self.error(ERROR_PACKAGE_NOT_FOUND, f"Package {pkg_name} not found in profile")
-				continue
+		self.percentage(10)
 
-			# Run nix profile upgrade
-			rc, _stdout, stderr = self._run_nix_command(["profile", "upgrade", str(element_index)])
+		# Upgrade everything in one nix invocation
+		element_indexes = [element_index for _pkg_name, _version, element_index in packages]
+		rc, _stdout, stderr = self._run_nix_command(["profile", "upgrade", *element_indexes])
 
-			if rc == 0:
-				self.percentage(100)
-				# Get new version
-				installed = self.profile.get_installed_packages()
-				new_version = installed.get(pkg_name, version)
-				self._emit_package(pkg_name, new_version, INFO_UPDATING)
-			else:
-				self.error(
-					ERROR_PACKAGE_FAILED_TO_INSTALL,
-					f"Failed to update {pkg_name}: {stderr}",
-				)
+		if rc == 0:
+			self.profile.reload()
+			self.percentage(100)
+			# Get new versions
+			installed = self.profile.get_installed_packages()
+			for pkg_name, version, _element_index in packages:
+				self._emit_package(pkg_name, installed.get(pkg_name, version), INFO_UPDATING)
+		else:
+			pkg_names = ", ".join(pkg_name for pkg_name, _version, _element_index in packages)
+			self.error(
+				ERROR_PACKAGE_FAILED_TO_INSTALL,
+				f"Failed to update {pkg_names}: {stderr}",
+			)
 
 	def update_system(self, transaction_flags):
 		"""Update all packages in the user's nix profile."""
@@ -803,6 +914,7 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		rc, _stdout, stderr = self._run_nix_command(["profile", "upgrade", ".*"])
 
 		if rc == 0:
+			self.profile.reload()
 			self.percentage(100)
 		else:
 			self.error(ERROR_PACKAGE_FAILED_TO_INSTALL, f"Failed to upgrade profile: {stderr}")
@@ -813,18 +925,18 @@ class PackageKitNixProfileBackend(PackageKitBaseBackend, PackagekitPackage):
 		self.percentage(0)
 		self.allow_cancel(True)
 
-		# Get installed packages
-		installed = self.profile.get_installed_packages()
-
-		# Emit installed packages efficiently using manifest data only
 		# Note: filters is a list of filter strings like ["~installed", "application"]
 		# "~" prefix means NOT, so "~installed" means "not installed"
-		# For simplicity, just always show installed packages since we don't
-		# have a full available packages database
-		for pkg_name, version in installed.items():
-			self._emit_installed_package(pkg_name, version, INFO_INSTALLED)
-
-		self.percentage(100)
+		# Only installed packages can be listed since we don't have a full
+		# available packages database, so "~installed" leaves nothing to emit
+		try:
+			if "~installed" not in filters:
+				# Emit installed packages efficiently using manifest data only
+				installed = self.profile.get_installed_packages()
+				for pkg_name, version in installed.items():
+					self._emit_installed_package(pkg_name, version, INFO_INSTALLED)
+		finally:
+			self.percentage(100)
 
 
 def main():
@@ -13,6 +13,18 @@ https://github.com/peterldowns/nix-search-cli
 
 import json
 import subprocess
+import sys
+import threading
+from collections import OrderedDict
+
+try:
+	import orjson
+except ImportError:
+	# orjson is an optional speedup; fall back to the stdlib json module
+	orjson = None
+
+# Most package metadata lookups kept in memory per NixSearch instance
+PACKAGE_INFO_CACHE_SIZE = 2048
 
 
 class NixSearch:
@@ -33,7 +45,9 @@ class NixSearch:
 			channel: Channel to search (default: "unstable")
 		"""
 		self.channel = channel
-		self._cache: dict[str, dict] = {}
+		# LRU cache of get_package_info results, shared by the backend's worker threads
+		self._cache: OrderedDict[str, dict] = OrderedDict()
+		self._cache_lock = threading.Lock()
 
 	def search(self, terms: list[str], limit: int = 100) -> dict[str, dict]:
 		"""
@@ -46,95 +60,35 @@ class NixSearch:
 		Returns:
 			Dictionary mapping package attribute names to metadata
 		"""
-		results = {}
-		search_query = " ".join(terms)
-
-		try:
-			cmd = [
-				"nix-search",
-				"--search",
-				search_query,
-				"--channel",
-				self.channel,
-				"--max-results",
-				str(limit),
-				"--json",
-			]
-
-			result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-
-			if result.returncode != 0:
-				print(f"nix-search failed: {result.stderr}")
-				return {}
-
-			# Parse JSON lines output
-			for line in result.stdout.strip().split("\n"):
-				if not line:
-					continue
-				try:
-					pkg = json.loads(line)
-					attr_name = pkg.get("package_attr_name", "")
-					if not attr_name:
-						continue
-
-					results[attr_name] = self._parse_package(pkg)
-
-				except json.JSONDecodeError:
-					continue
-
-		except subprocess.TimeoutExpired:
-			print("nix-search timed out")
-		except Exception as e:
-			print(f"Error during nix-search: {e}")
-
-		return results
+		return self._run_nix_search("--search", " ".join(terms), limit)
 
 	def search_by_name(self, name: str, limit: int = 20) -> dict[str, dict]:
 		"""Search by package attribute name."""
-		results = {}
+		return self._run_nix_search("--name", name, limit)
 
-		try:
-			cmd = [
-				"nix-search",
-				"--name",
-				name,
-				"--channel",
-				self.channel,
-				"--max-results",
-				str(limit),
-				"--json",
-			]
-
-			result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-
-			if result.returncode != 0:
-				return {}
-
-			for line in result.stdout.strip().split("\n"):
-				if not line:
-					continue
-				try:
-					pkg = json.loads(line)
-					attr_name = pkg.get("package_attr_name", "")
-					if attr_name:
-						results[attr_name] = self._parse_package(pkg)
-				except json.JSONDecodeError:
-					continue
+	def search_by_program(self, program: str, limit: int = 20) -> dict[str, dict]:
+		"""Search by installed program name."""
+		return self._run_nix_search("--program", program, limit)
 
-		except Exception as e:
-			print(f"Error during nix-search: {e}")
+	def _run_nix_search(self, flag: str, value: str, limit: int) -> dict[str, dict]:
+		"""
+		Run a nix-search-cli query and parse its JSON lines output.
 
-		return results
+		Args:
+			flag: nix-search query flag ("--search", "--name" or "--program")
+			value: Query value for the flag
+			limit: Maximum results to return
 
-	def search_by_program(self, program: str, limit: int = 20) -> dict[str, dict]:
-		"""Search by installed program name."""
+		Returns:
+			Dictionary mapping package attribute names to metadata
+		"""
 		results = {}
 
 		try:
 			cmd = [
 				"nix-search",
-				"--program",
-				program,
+				flag,
+				value,
 				"--channel",
 				self.channel,
 				"--max-results",
@@ -142,24 +96,29 @@ class NixSearch:
 				"--json",
 			]
 
-			result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+			result = subprocess.run(cmd, capture_output=True, timeout=30)
 
+			# Diagnostics go to stderr: stdout is the PackageKit spawn backend's protocol channel
 			if result.returncode != 0:
+				print(f"nix-search failed: {result.stderr.decode('utf-8', 'replace')}", file=sys.stderr)
 				return {}
 
-			for line in result.stdout.strip().split("\n"):
+			# Parse JSON lines output straight from bytes; both JSON parsers accept them
+			for line in result.stdout.splitlines():
 				if not line:
 					continue
 				try:
-					pkg = json.loads(line)
+					pkg = orjson.loads(line) if orjson is not None else json.loads(line)
 					attr_name = pkg.get("package_attr_name", "")
 					if attr_name:
 						results[attr_name] = self._parse_package(pkg)
 				except json.JSONDecodeError:
 					continue
 
+		except subprocess.TimeoutExpired:
+			print("nix-search timed out", file=sys.stderr)
 		except Exception as e:
-			print(f"Error during nix-search: {e}")
+			print(f"Error during nix-search: {e}", file=sys.stderr)
 
 		return results
 
@@ -233,25 +192,44 @@ class NixSearch:
 			Package metadata or None
 		"""
 		# Check cache first
-		if package_name in self._cache:
-			return self._cache[package_name]
+		with self._cache_lock:
+			info = self._cache.get(package_name)
+			if info is not None:
+				self._cache.move_to_end(package_name)
+				return info
 
 		# Search by exact name
 		results = self.search_by_name(package_name, limit=5)
 
 		# Look for exact match
 		if package_name in results:
-			self._cache[package_name] = results[package_name]
-			return results[package_name]
+			return self._cache_package_info(package_name, results[package_name])
 
 		# Try partial match
 		for _name, info in results.items():
 			if info.get("pname") == package_name:
-				self._cache[package_name] = info
-				return info
+				return self._cache_package_info(package_name, info)
 
 		return None
 
+	def _cache_package_info(self, package_name: str, info: dict) -> dict:
+		"""
+		Store package metadata in the LRU cache, evicting the oldest entry when full.
+
+		Args:
+			package_name: Package attribute name
+			info: Parsed package metadata
+
+		Returns:
+			The cached metadata
+		"""
+		with self._cache_lock:
+			self._cache[package_name] = info
+			self._cache.move_to_end(package_name)
+			if len(self._cache) > PACKAGE_INFO_CACHE_SIZE:
+				self._cache.popitem(last=False)
+		return info
+
 	def resolve_package(self, package_name: str) -> tuple[str, str] | None:
 		"""
 		Resolve a package name to its attribute path and version.
@@ -32,6 +32,7 @@ let
 
     dependencies = with python3.pkgs; [
       (toPythonModule packagekit)
+      orjson # Optional: faster manifest and log JSON parsing
     ];
 
     makeWrapperArgs = [
@@ -2,16 +2,22 @@
 """Unit tests for nix_profile module."""
 
 import json
+import os
 import tempfile
+import time
 from pathlib import Path
 from unittest import mock
 
-from nix_profile import NixProfile
+from nix_profile import NixProfile, _lookup_user
 
 
 class TestNixProfileUserResolution:
 	"""Tests for user profile resolution (PackageKit UID handling)."""
 
+	def setup_method(self):
+		"""Start each test without cached passwd lookups."""
+		_lookup_user.cache_clear()
+
 	def test_resolve_profile_from_packagekit_uid(self):
 		"""Test that UID env var from PackageKit resolves to correct user profile."""
 		# Get current user info to use in test
@@ -42,6 +48,20 @@ class TestNixProfileUserResolution:
 					profile = NixProfile()
 					assert profile.profile_path == Path("/nix/var/nix/profiles/per-user/testuser/profile")
 
+	def test_resolve_profile_caches_user_lookup(self):
+		"""Test that the passwd lookup for a UID is done once."""
+		mock_pw = mock.MagicMock()
+		mock_pw.pw_name = "testuser"
+		mock_pw.pw_dir = "/home/testuser"
+
+		with mock.patch.dict("os.environ", {"UID": "1000"}, clear=True):
+			with mock.patch("pwd.getpwuid", return_value=mock_pw) as mock_getpwuid:
+				with mock.patch("os.path.exists", return_value=False):
+					NixProfile()
+					profile = NixProfile()
+					mock_getpwuid.assert_called_once_with(1000)
+					assert profile.profile_path == Path("/nix/var/nix/profiles/per-user/testuser/profile")
+
 	def test_resolve_profile_no_uid_uses_home(self):
 		"""Test that without UID, HOME env var is used."""
 		with mock.patch.dict("os.environ", {"HOME": "/home/anotheruser"}, clear=True):
@@ -256,3 +276,54 @@ class TestNixProfile:
 			# Has elements = not empty
 			manifest.write_text(json.dumps({"elements": [{"attrPath": "foo"}]}))
 			assert profile.is_empty() is False
+
+	def test_manifest_shared_between_instances(self):
+		"""Test that profiles on the same manifest share one parsed copy."""
+		with tempfile.TemporaryDirectory() as tmpdir:
+			manifest = Path(tmpdir) / "manifest.json"
+			manifest.write_text(json.dumps({"version": 2, "elements": [{"attrPath": "vim"}]}))
+
+			loaded = NixProfile(tmpdir).manifest
+			assert loaded is not None
+			assert NixProfile(tmpdir).manifest is loaded
+
+	def test_manifest_rewritten_with_same_size_and_mtime(self):
+		"""Test a same-size manifest on the same inode with the store's fixed mtime is re-read."""
+		with tempfile.TemporaryDirectory() as tmpdir:
+			manifest = Path(tmpdir) / "manifest.json"
+			manifest.write_text(json.dumps({"version": 2, "elements": [{"attrPath": "vim"}]}))
+			os.utime(manifest, ns=(1_000_000_000, 1_000_000_000))
+
+			profile = NixProfile(tmpdir)
+			assert profile.find_package_index("vim") == "vim"
+
+			# Give the filesystem's ctime clock a chance to tick
+			time.sleep(0.05)
+			with open(manifest, "r+b") as f:
+				f.write(json.dumps({"version": 2, "elements": [{"attrPath": "git"}]}).encode())
+			os.utime(manifest, ns=(1_000_000_000, 1_000_000_000))
+
+			assert profile.find_package_index("vim") is None
+			assert profile.find_package_index("git") == "git"
+			assert NixProfile(tmpdir).find_package_index("git") == "git"
+
+	def test_manifest_cached_until_changed(self):
+		"""Test the manifest is parsed once and re-read only after it changes."""
+		with tempfile.TemporaryDirectory() as tmpdir:
+			manifest = Path(tmpdir) / "manifest.json"
+			manifest.write_text(json.dumps({"version": 2, "elements": [{"attrPath": "vim"}]}))
+
+			profile = NixProfile(tmpdir)
+			with mock.patch.object(profile, "_parse_manifest", wraps=profile._parse_manifest) as parse:
+				assert profile.find_package_index("vim") == "vim"
+				assert profile.is_empty() is False
+				assert parse.call_count == 1
+
+				manifest.write_text(json.dumps({"version": 2, "elements": [{"attrPath": "git"}, {}]}))
+				assert profile.find_package_index("vim") is None
+				assert profile.find_package_index("git") == "git"
+				assert parse.call_count == 2
+
+				profile.reload()
+				assert profile.manifest is not None
+				assert parse.call_count == 3
@@ -35,7 +35,7 @@ class TestNixProfileBackendProfileFlag:
 			mock_process = mock.MagicMock()
 			mock_process.returncode = 0
 			mock_process.stderr = []
-			mock_process.communicate.return_value = ("", "")
+			mock_process.communicate.return_value = (b"", b"")
 			mock_popen.return_value = mock_process
 
 			mock_backend._run_nix_command(["profile", "install", "nixpkgs#firefox"])
@@ -59,7 +59,7 @@ class TestNixProfileBackendProfileFlag:
 			mock_process = mock.MagicMock()
 			mock_process.returncode = 0
 			mock_process.stderr = []
-			mock_process.communicate.return_value = ("", "")
+			mock_process.communicate.return_value = (b"", b"")
 			mock_popen.return_value = mock_process
 
 			mock_backend._run_nix_command(["profile", "remove", "firefox"])
@@ -80,7 +80,7 @@ class TestNixProfileBackendProfileFlag:
 			mock_process = mock.MagicMock()
 			mock_process.returncode = 0
 			mock_process.stderr = []
-			mock_process.communicate.return_value = ("", "")
+			mock_process.communicate.return_value = (b"", b"")
 			mock_popen.return_value = mock_process
 
 			mock_backend._run_nix_command(["profile", "upgrade", ".*"])
@@ -100,7 +100,7 @@ class TestNixProfileBackendProfileFlag:
 			mock_process = mock.MagicMock()
 			mock_process.returncode = 0
 			mock_process.stderr = []
-			mock_process.communicate.return_value = ('{"packages": []}', "")
+			mock_process.communicate.return_value = (b'{"packages": []}', b"")
 			mock_popen.return_value = mock_process
 
 			mock_backend._run_nix_command(["search", "nixpkgs", "firefox"])
@@ -117,7 +117,7 @@ class TestNixProfileBackendProfileFlag:
 			mock_process = mock.MagicMock()
 			mock_process.returncode = 0
 			mock_process.stderr = []
-			mock_process.communicate.return_value = ("", "")
+			mock_process.communicate.return_value = (b"", b"")
 			mock_popen.return_value = mock_process
 
 			mock_backend._run_nix_command(["profile", "list"], use_profile=False)
@@ -133,7 +133,7 @@ class TestNixProfileBackendProfileFlag:
 			mock_process = mock.MagicMock()
 			mock_process.returncode = 0
 			mock_process.stderr = []
-			mock_process.communicate.return_value = ("", "")
+			mock_process.communicate.return_value = (b"", b"")
 			mock_popen.return_value = mock_process
 
 			# Just "profile" without action - shouldn't add --profile
@@ -272,7 +272,7 @@ class TestNixProfileBackendEnvironment:
 				mock_process = mock.MagicMock()
 				mock_process.returncode = 0
 				mock_process.stderr = []
-				mock_process.communicate.return_value = ("", "")
+				mock_process.communicate.return_value = (b"", b"")
 				mock_popen.return_value = mock_process
 
 				mock_backend._run_nix_command(["profile", "install", "nixpkgs#google-chrome"])
@@ -289,7 +289,7 @@ class TestNixProfileBackendEnvironment:
 				mock_process = mock.MagicMock()
 				mock_process.returncode = 0
 				mock_process.stderr = []
-				mock_process.communicate.return_value = ("", "")
+				mock_process.communicate.return_value = (b"", b"")
 				mock_popen.return_value = mock_process
 
 				mock_backend._run_nix_command(["profile", "upgrade", "some-package"])
@@ -358,6 +358,32 @@ error: 1 dependencies of derivation failed to build"""
 		assert filtered == ""
 
 
+class TestPackageIdFormat:
+	"""Tests for PackageKit package ID construction."""
+
+	@pytest.fixture
+	def mock_backend(self):
+		"""Create a mock backend for testing package IDs."""
+		with mock.patch("nix_profile_backend.PackageKitBaseBackend"):
+			with mock.patch("nix_profile_backend.PackagekitPackage"):
+				with mock.patch("nix_profile_backend.NixProfile"):
+					with mock.patch("nix_profile_backend.NixSearch"):
+						from nix_profile_backend import PackageKitNixProfileBackend
+
+						yield PackageKitNixProfileBackend([])
+
+	def test_package_id_matches_packagekit_format(self, mock_backend):
+		"""Test that the inlined package ID matches packagekit's get_package_id."""
+		from packagekit.backend import get_package_id
+
+		assert mock_backend._pkg_to_package_id("hello", "2.12.1") == get_package_id(
+			"hello", "2.12.1", "noarch", "nixpkgs"
+		)
+		assert mock_backend._pkg_to_package_id("hello", "", "x86_64") == get_package_id(
+			"hello", "unknown", "x86_64", "nixpkgs"
+		)
+
+
 class TestGetUpdatesVersionHandling:
 	"""Tests for get_updates with normalized versions from nix_search."""
 
@@ -429,3 +455,238 @@ class TestGetUpdatesVersionHandling:
 
 		# Verify that an update WAS emitted (because versions differ)
 		mock_backend.package.assert_called_once()
+
+
+class TestNixLogParser:
+	"""Tests for parsing nix internal-json log lines."""
+
+	def test_parses_prefixed_lines_and_skips_other_output(self):
+		"""Test that '@nix ' lines are parsed and non-JSON lines are ignored."""
+		from nix_profile_backend import NixLogParser
+
+		callback = mock.MagicMock()
+		parser = NixLogParser(callback)
+
+		parser.parse_line('@nix {"action":"start","id":1,"text":"building"}')
+		parser.parse_line("error: builder failed")
+		parser.parse_line("")
+		parser.parse_line('@nix {"action":"stop","id":1}')
+
+		assert callback.call_args_list == [mock.call(30, "building"), mock.call(20, "Processing...")]
+
+
+class TestGetPackagesFilters:
+	"""Tests for filter handling in get_packages."""
+
+	@pytest.fixture
+	def mock_backend(self):
+		"""Create a mock backend with one installed package."""
+		with mock.patch("nix_profile_backend.PackageKitBaseBackend"):
+			with mock.patch("nix_profile_backend.PackagekitPackage"):
+				with mock.patch("nix_profile_backend.NixProfile") as mock_profile:
+					with mock.patch("nix_profile_backend.NixSearch"):
+						mock_profile_instance = mock.MagicMock()
+						mock_profile_instance.get_installed_packages.return_value = {"hello": "2.12.1"}
+						mock_profile.return_value = mock_profile_instance
+
+						from nix_profile_backend import PackageKitNixProfileBackend
+
+						backend = PackageKitNixProfileBackend([])
+						backend.status = mock.MagicMock()
+						backend.percentage = mock.MagicMock()
+						backend.allow_cancel = mock.MagicMock()
+						backend._emit_installed_package = mock.MagicMock()
+						yield backend
+
+	def test_not_installed_filter_skips_installed_packages(self, mock_backend):
+		"""Test that '~installed' emits nothing but still reports completion."""
+		mock_backend.get_packages(["~installed"])
+
+		mock_backend._emit_installed_package.assert_not_called()
+		mock_backend.profile.get_installed_packages.assert_not_called()
+		mock_backend.percentage.assert_called_with(100)
+
+	def test_installed_filter_emits_installed_packages(self, mock_backend):
+		"""Test that installed packages are emitted without a '~installed' filter."""
+		mock_backend.get_packages(["installed"])
+
+		mock_backend._emit_installed_package.assert_called_once()
+		mock_backend.percentage.assert_called_with(100)
+
+
+class TestBatchedProfileCommands:
+	"""Tests that install/remove/update run a single nix command for all packages."""
+
+	@pytest.fixture
+	def mock_backend(self):
+		"""Create a mock backend with firefox and vim installed and nix calls mocked."""
+		with mock.patch("nix_profile_backend.PackageKitBaseBackend"):
+			with mock.patch("nix_profile_backend.PackagekitPackage"):
+				with mock.patch("nix_profile_backend.NixProfile") as mock_profile:
+					with mock.patch("nix_profile_backend.NixSearch"):
+						mock_profile_instance = mock.MagicMock()
+						mock_profile_instance.find_package_index.side_effect = {"firefox": 0, "vim": 3}.get
+						mock_profile_instance.get_installed_packages.return_value = {
+							"firefox": "123.0",
+							"vim": "9.1",
+						}
+						mock_profile.return_value = mock_profile_instance
+
+						from nix_profile_backend import PackageKitNixProfileBackend
+
+						backend = PackageKitNixProfileBackend([])
+						backend.status = mock.MagicMock()
+						backend.percentage = mock.MagicMock()
+						backend.allow_cancel = mock.MagicMock()
+						backend.error = mock.MagicMock()
+						backend._emit_package = mock.MagicMock()
+						backend._run_nix_command = mock.MagicMock(return_value=(0, "", ""))
+						yield backend
+
+	def test_install_multiple_packages_in_one_command(self, mock_backend):
+		"""Test that all installables are passed to a single nix profile add."""
+		mock_backend.install_packages([], ["firefox;123.0;noarch;nixpkgs", "vim;9.1;noarch;nixpkgs"])
+
+		mock_backend._run_nix_command.assert_called_once_with(
+			["profile", "add", "nixpkgs#firefox", "nixpkgs#vim"]
+		)
+		mock_backend.profile.reload.assert_called_once()
+		assert mock_backend._emit_package.call_count == 2
+		mock_backend.error.assert_not_called()
+
+	def test_install_failure_names_every_package(self, mock_backend):
+		"""Test that a failed batch install reports all package names."""
+		from nix_profile_backend import ERROR_PACKAGE_FAILED_TO_INSTALL
+
+		mock_backend._run_nix_command.return_value = (1, "", "error: boom")
+
+		mock_backend.install_packages([], ["firefox;123.0;noarch;nixpkgs", "vim;9.1;noarch;nixpkgs"])
+
+		mock_backend.error.assert_called_once_with(
+			ERROR_PACKAGE_FAILED_TO_INSTALL, "Failed to install firefox, vim: error: boom"
+		)
+		mock_backend.profile.reload.assert_not_called()
+		mock_backend._emit_package.assert_not_called()
+
+	def test_remove_multiple_packages_in_one_command(self, mock_backend):
+		"""Test that all element indexes are passed to a single nix profile remove."""
+		from nix_profile_backend import ERROR_PACKAGE_NOT_FOUND
+
+		mock_backend.remove_packages(
+			[],
+			["firefox;123.0;noarch;nixpkgs", "missing;1.0;noarch;nixpkgs", "vim;9.1;noarch;nixpkgs"],
+			False,
+			False,
+		)
+
+		mock_backend._run_nix_command.assert_called_once_with(["profile", "remove", "0", "3"])
+		mock_backend.error.assert_called_once_with(
+			ERROR_PACKAGE_NOT_FOUND, "Package missing not found in profile"
+		)
+		mock_backend.profile.reload.assert_called_once()
+		assert mock_backend._emit_package.call_count == 2
+
+	def test_remove_failure_names_every_package(self, mock_backend):
+		"""Test that a failed batch remove reports all package names."""
+		from nix_profile_backend import ERROR_PACKAGE_FAILED_TO_REMOVE
+
+		mock_backend._run_nix_command.return_value = (1, "", "error: boom")
+
+		mock_backend.remove_packages(
+			[], ["firefox;123.0;noarch;nixpkgs", "vim;9.1;noarch;nixpkgs"], False, False
+		)
+
+		mock_backend.error.assert_called_once_with(
+			ERROR_PACKAGE_FAILED_TO_REMOVE, "Failed to remove firefox, vim: error: boom"
+		)
+		mock_backend.profile.reload.assert_not_called()
+
+	def test_update_multiple_packages_in_one_command(self, mock_backend):
+		"""Test that all element indexes are passed to a single nix profile upgrade."""
+		mock_backend.update_packages([], ["firefox;122.0;noarch;nixpkgs", "vim;9.0;noarch;nixpkgs"])
+
+		mock_backend._run_nix_command.assert_called_once_with(["profile", "upgrade", "0", "3"])
+		mock_backend.profile.reload.assert_called_once()
+		assert mock_backend._emit_package.call_args_list == [
+			mock.call("firefox", "123.0", mock.ANY),
+			mock.call("vim", "9.1", mock.ANY),
+		]
+
+	def test_update_failure_names_every_package(self, mock_backend):
+		"""Test that a failed batch update reports all package names."""
+		from nix_profile_backend import ERROR_PACKAGE_FAILED_TO_INSTALL
+
+		mock_backend._run_nix_command.return_value = (1, "", "error: boom")
+
+		mock_backend.update_packages([], ["firefox;122.0;noarch;nixpkgs", "vim;9.0;noarch;nixpkgs"])
+
+		mock_backend.error.assert_called_once_with(
+			ERROR_PACKAGE_FAILED_TO_INSTALL, "Failed to update firefox, vim: error: boom"
+		)
+		mock_backend.profile.reload.assert_not_called()
+
+
+class TestNixOutputStreaming:
+	"""Tests for draining a nix command's stdout and stderr together."""
+
+	CHILD_SCRIPT = r"""
+import os, sys, time
+
+out, err = sys.stdout.buffer, sys.stderr.buffer
+for i in range(4):
+	out.write(b"%d" % i * 60000)
+	out.flush()
+	err.write(b"error: line %d\n" % i)
+	err.flush()
+	time.sleep(0.01)
+# A log event split across two writes
+err.write(b'@nix {"action":"start","id":1,"te')
+err.flush()
+time.sleep(0.01)
+err.write(b'xt":"building"}\n')
+err.write(b"warning: " + b"x" * 100000 + b"\n")
+err.flush()
+os.close(1)
+time.sleep(0.05)
+err.write(b'@nix {"action":"stop","id":1}\r\nerror: final failure')
+"""
+
+	@pytest.fixture
+	def mock_backend(self):
+		"""Create a mock backend for testing output streaming."""
+		with mock.patch("nix_profile_backend.PackageKitBaseBackend"):
+			with mock.patch("nix_profile_backend.PackagekitPackage"):
+				with mock.patch("nix_profile_backend.NixProfile"):
+					with mock.patch("nix_profile_backend.NixSearch"):
+						from nix_profile_backend import PackageKitNixProfileBackend
+
+						yield PackageKitNixProfileBackend([])
+
+	def test_stream_split_lines_and_early_stdout_eof(self, mock_backend):
+		"""Test chunk-split stderr lines, interleaved pipes and stdout closing before stderr."""
+		import subprocess
+		import sys
+
+		from nix_profile_backend import NixLogParser
+
+		callback = mock.MagicMock()
+		parser = NixLogParser(callback)
+		stderr_lines = []
+
+		process = subprocess.Popen(
+			[sys.executable, "-c", self.CHILD_SCRIPT], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+		)
+		stdout = mock_backend._stream_nix_output(process, parser, stderr_lines)
+		assert process.wait(timeout=10) == 0
+
+		assert stdout == b"".join(b"%d" % i * 60000 for i in range(4))
+		assert stderr_lines == [
+			"error: line 0",
+			"error: line 1",
+			"error: line 2",
+			"error: line 3",
+			"warning: " + "x" * 100000,
+			"error: final failure",
+		]
+		assert callback.call_args_list == [mock.call(30, "building"), mock.call(20, "Processing...")]
+		assert parser.activities == {}
@@ -61,7 +61,9 @@ class TestNixSearch:
 	def test_search(self, mock_run):
 		"""Test search method."""
 		mock_run.return_value = mock.Mock(
-			returncode=0, stdout='{"package_attr_name": "firefox", "package_pversion": "122.0"}\n', stderr=""
+			returncode=0,
+			stdout=b'{"package_attr_name": "firefox", "package_pversion": "122.0"}\n',
+			stderr=b"",
 		)
 
 		search = NixSearch()
@@ -80,7 +82,7 @@ class TestNixSearch:
 	def test_search_by_name(self, mock_run):
 		"""Test search_by_name method."""
 		mock_run.return_value = mock.Mock(
-			returncode=0, stdout='{"package_attr_name": "vim", "package_pversion": "9.0"}\n', stderr=""
+			returncode=0, stdout=b'{"package_attr_name": "vim", "package_pversion": "9.0"}\n', stderr=b""
 		)
 
 		search = NixSearch()
@@ -104,11 +106,28 @@ class TestNixSearch:
 
 		assert results == {}
 
+	@mock.patch("subprocess.run")
+	def test_failures_are_reported_on_stderr(self, mock_run, capsys):
+		"""Test that nix-search diagnostics never reach the PackageKit stdout channel."""
+		import subprocess
+
+		search = NixSearch()
+
+		mock_run.return_value = mock.Mock(returncode=1, stdout=b"", stderr=b"network error")
+		assert search.search_by_name("vim") == {}
+		mock_run.side_effect = subprocess.TimeoutExpired("nix-search", 30)
+		assert search.search_by_program("vim") == {}
+
+		captured = capsys.readouterr()
+		assert captured.out == ""
+		assert "nix-search failed: network error" in captured.err
+		assert "nix-search timed out" in captured.err
+
 	@mock.patch("subprocess.run")
 	def test_get_package_info_caching(self, mock_run):
 		"""Test that get_package_info caches results."""
 		mock_run.return_value = mock.Mock(
-			returncode=0, stdout='{"package_attr_name": "git", "package_pversion": "2.43"}\n', stderr=""
+			returncode=0, stdout=b'{"package_attr_name": "git", "package_pversion": "2.43"}\n', stderr=b""
 		)
 
 		search = NixSearch()
@@ -123,6 +142,21 @@ class TestNixSearch:
 		assert info2 == info1
 		assert mock_run.call_count == 1  # No additional call
 
+	@mock.patch("nix_search.PACKAGE_INFO_CACHE_SIZE", 2)
+	@mock.patch("subprocess.run")
+	def test_get_package_info_cache_is_bounded(self, mock_run):
+		"""Test that the least recently used package is evicted from the cache."""
+		search = NixSearch()
+
+		for name in ("git", "vim", "git", "curl"):
+			mock_run.return_value = mock.Mock(
+				returncode=0, stdout=f'{{"package_attr_name": "{name}"}}\n'.encode(), stderr=b""
+			)
+			search.get_package_info(name)
+
+		assert list(search._cache) == ["git", "curl"]
+		assert mock_run.call_count == 3
+
 
 class TestVersionNormalization:
 	"""Tests for version normalization in NixSearch."""